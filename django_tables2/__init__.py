@@ -1,10 +1,12 @@
 # coding: utf-8
 # pylint: disable=W0611
 from .tables  import Table
-from .columns import (BooleanColumn, Column, CheckBoxColumn, DateColumn,
-                      DateTimeColumn, EmailColumn, FileColumn, LinkColumn,
-                      TemplateColumn, URLColumn)
+from .columns import (BooleanColumn, Column, CheckBoxColumn, ConcurrentColumn,
+                      DateColumn, DateTimeColumn, EmailColumn, ExpressionColumn,
+                      FileColumn, LinkColumn, TemplateColumn, URLColumn)
 from .config  import RequestConfig
+from .paginators import WindowCountPaginator
+from .renderers import NativeRenderer, StreamingRenderer
 from .utils   import A, Attrs
 try:
     from .views   import SingleTableMixin, SingleTableView
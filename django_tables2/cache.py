@@ -0,0 +1,279 @@
+# coding: utf-8
+"""
+Caching of rendered tables, invalidated when the models they display change.
+"""
+from __future__ import absolute_import, unicode_literals
+from django.core.cache import cache as default_cache, get_cache
+from django.db.models.fields import FieldDoesNotExist
+from django.db.models.signals import post_delete, post_save
+from django.utils.encoding import force_unicode, smart_str
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+import hashlib
+import time
+from .renderers import render_value
+from .utils import A
+
+try:
+    from django.utils.timezone import get_current_timezone_name
+except ImportError:
+    # Django < 1.4
+    get_current_timezone_name = lambda: None
+
+try:
+    # Django >= 1.5
+    from django.utils.encoding import force_bytes
+except ImportError:
+    force_bytes = smart_str
+
+
+KEY_PREFIX = "django_tables2"
+#: Seconds a regenerating request holds the lock for a stale entry.
+LOCK_TIMEOUT = 30
+#: Seconds model generations are kept (the maximum memcached allows).
+GENERATION_TIMEOUT = 60 * 60 * 24 * 30
+
+#: Number of rows whose cached cells are fetched with a single ``get_many``.
+ROW_BATCH_SIZE = 100
+
+# Aliases of the caches that tables are cached in.
+_aliases = set()
+# Models whose changes invalidate cached tables.
+_connected = set()
+
+
+def get_backend(alias):
+    return default_cache if alias == "default" else get_cache(alias)
+
+
+def model_key(model):
+    opts = getattr(model._meta, "concrete_model", None) or model
+    opts = opts._meta
+    return "%s:generation:%s.%s" % (KEY_PREFIX, opts.app_label,
+                                    opts.object_name.lower())
+
+
+def related_models(model, accessor):
+    """
+    Return the models that are traversed by an *accessor* (e.g.
+    ``"occupation.region.name"``) starting from *model*.
+    """
+    models = []
+    for name in accessor.bits:
+        try:
+            field = model._meta.get_field_by_name(name)[0]
+        except FieldDoesNotExist:
+            break
+        rel = getattr(field, "rel", None)
+        if rel is not None and getattr(rel, "to", None) is not None:
+            model = rel.to
+        elif hasattr(field, "field") and hasattr(field, "model"):
+            # reverse relation (RelatedObject)
+            model = field.model
+        else:
+            break
+        models.append(model)
+    return models
+
+
+def accessor_models(model, accessors):
+    """
+    Return *model* and the models that *accessors* traverse from it.
+    """
+    models = [model]
+    for accessor in accessors:
+        for related in related_models(model, accessor):
+            if related not in models:
+                models.append(related)
+    return models
+
+
+def table_models(table):
+    """
+    Return the models whose changes affect the rendering of *table*, i.e.
+    the queryset's model and the models its columns' accessors traverse.
+    """
+    return accessor_models(table.data.queryset.model,
+                           [column.accessor for column in table.columns])
+
+
+def get_generations(cache, models):
+    """
+    Return the current generation of each model. A model's generation
+    changes each time one of its instances is saved or deleted.
+    """
+    keys = [model_key(model) for model in models]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            # Start from the current time, so that a generation that's been
+            # evicted from the cache never repeats a previous value.
+            cache.add(key, int(time.time() * 1000), GENERATION_TIMEOUT)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def bump_generation(sender, **kwargs):
+    """
+    Signal receiver that invalidates the cached tables of *sender*.
+    """
+    key = model_key(sender)
+    for alias in _aliases:
+        try:
+            get_backend(alias).incr(key)
+        except ValueError:
+            # Nothing has been cached using the current generation.
+            pass
+
+
+def connect_signals(models, alias="default"):
+    """
+    Connect the receivers that invalidate the tables cached in the cache
+    *alias* when an instance of one of *models* is saved or deleted. Called
+    when a table that uses caching is defined (for `.Table.Meta.model`), and
+    when it's rendered (for the models of its data).
+
+    Only the given models are connected, so saving a model that no cached
+    table uses doesn't touch the cache.
+    """
+    _aliases.add(alias)
+    for model in models:
+        if model in _connected:
+            continue
+        _connected.add(model)
+        post_save.connect(bump_generation, sender=model,
+                          dispatch_uid="django_tables2.cache")
+        post_delete.connect(bump_generation, sender=model,
+                            dispatch_uid="django_tables2.cache")
+
+
+def cache_key(table, request=None, template=None):
+    """
+    Return the key of the cached rendering of *table*, or `None` if it can't
+    be cached (only tables of querysets can).
+
+    The key includes the table class, the SQL of the query, the ordering,
+    the current page and number of rows per page, the prefix, the language,
+    the querystring (which is included in the table's links), the template,
+    the values of `.Table.Meta.cache_vary_on` for the request, and the
+    generation of each model the table uses.
+    """
+    options = table._meta
+    queryset = getattr(table.data, "queryset", None)
+    if options.cache_timeout is None or queryset is None:
+        return None
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except Exception:  # e.g. EmptyResultSet
+        sql, params = "", ()
+    page = getattr(table, "page", None)
+    cls = type(table)
+    models = table_models(table)
+    connect_signals(models, options.cache_alias)
+    parts = [
+        cls.__module__, cls.__name__,
+        queryset.db, sql, params,
+        table.order_by,
+        page.number if page else None,
+        table.paginator.per_page if page else None,
+        table.prefix,
+        get_language(),
+        sorted(request.GET.lists()) if request is not None else None,
+        template,
+        [A(accessor).resolve(request, quiet=True) if request is not None else None
+         for accessor in options.cache_vary_on],
+        [column.name for column in table.columns],
+        get_generations(get_backend(options.cache_alias), models),
+    ]
+    digest = hashlib.md5(force_bytes(force_unicode(repr(parts)))).hexdigest()
+    return "%s:fragment:%s" % (KEY_PREFIX, digest)
+
+
+def render_cached(table, render, request=None, template=None):
+    """
+    Return the rendered *table*, from the cache if possible.
+
+    :param  render: callable that renders the table, used on cache misses
+    :param request: the request the table is rendered for
+    :param template: the name of the template (or templates) used
+
+    Caching is configured using `.Table.Meta.cache_timeout`,
+    `~.Table.Meta.cache_stale_timeout`, and `~.Table.Meta.cache_alias`.
+    Once an entry is older than *cache_timeout* (but not *cache_stale_timeout*
+    more) the first request to notice renders the table again, while
+    concurrent requests keep being served the stale entry.
+    """
+    key = cache_key(table, request, template)
+    if key is None:
+        return render()
+    options = table._meta
+    cache = get_backend(options.cache_alias)
+    entry = cache.get(key)
+    now = time.time()
+    if entry is not None:
+        expires, html = entry
+        if now < expires:
+            return html
+        # Stale, only one request at a time regenerates it.
+        if not cache.add(key + ":lock", 1, LOCK_TIMEOUT):
+            return html
+    html = render()
+    cache.set(key, (now + options.cache_timeout, html),
+              options.cache_timeout + options.cache_stale_timeout)
+    if entry is not None:
+        cache.delete(key + ":lock")
+    return html
+
+
+def row_cache_enabled(table):
+    """
+    Return `True` if the rows of *table* should use the row cache, i.e.
+    `.Table.Meta.row_cache_timeout` is set and the table is being rendered.
+    """
+    return (table._meta.row_cache_timeout is not None
+            and getattr(table, "context", None) is not None)
+
+
+def row_cache_key(table, record, names):
+    """
+    Return the key of the cached cells of *record*, or `None` if the record
+    doesn't have a primary key.
+    """
+    pk = A("pk").resolve(record, quiet=True)
+    if pk is None:
+        return None
+    version_field = table._meta.row_cache_version
+    version = A(version_field).resolve(record, quiet=True) if version_field else None
+    cls = type(table)
+    parts = [cls.__module__, cls.__name__, names, pk, version, table.default,
+             get_language(), get_current_timezone_name()]
+    digest = hashlib.md5(force_bytes(force_unicode(repr(parts)))).hexdigest()
+    return "%s:row:%s" % (KEY_PREFIX, digest)
+
+
+def cache_rows(rows):
+    """
+    Load the cached cells of a batch of `.BoundRow` objects (using a single
+    ``get_many``), rendering and caching the cells of rows that miss.
+
+    The cells are cached as the HTML that ``{{ cell }}`` outputs in the
+    table's template.
+    """
+    if not rows:
+        return
+    table = rows[0].table
+    options = table._meta
+    names = [column.name for column in table.columns]
+    keyed = [(row_cache_key(table, row.record, names), row) for row in rows]
+    keyed = [(key, row) for key, row in keyed if key is not None]
+    cache = get_backend(options.cache_alias)
+    cached = cache.get_many([key for key, row in keyed])
+    missing = {}
+    for key, row in keyed:
+        cells = cached.get(key)
+        if cells is None:
+            cells = missing[key] = [force_unicode(render_value(cell, table.context))
+                                    for column, cell in row.items()]
+        row._cells = [mark_safe(cell) for cell in cells]
+    if missing:
+        cache.set_many(missing, options.row_cache_timeout)
@@ -1,9 +1,11 @@
 from .base import library, BoundColumn, BoundColumns, Column
 from .booleancolumn import BooleanColumn
 from .checkboxcolumn import CheckBoxColumn
+from .concurrentcolumn import ConcurrentColumn
 from .datecolumn import DateColumn
 from .datetimecolumn import DateTimeColumn
 from .emailcolumn import EmailColumn
+from .expressioncolumn import ExpressionColumn
 from .filecolumn import FileColumn
 from .linkcolumn import LinkColumn
 from .templatecolumn import TemplateColumn
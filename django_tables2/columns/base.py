@@ -93,6 +93,16 @@ class Column(object):  # pylint: disable=R0902
                arguments.
 
 
+    .. attribute:: footer
+
+        An aggregate of the column's values shown in the table's footer:
+        ``"sum"``, ``"avg"``, ``"min"``, ``"max"``, ``"count"``, or an
+        aggregate (e.g. ``Sum("price")``) of one of those kinds. See
+        :ref:`footers`.
+
+        :type: `unicode` or `~django.db.models.Aggregate`
+
+
     .. attribute:: order_by
 
         Allows one or more accessors to be used for ordering rather than
@@ -128,10 +138,14 @@ class Column(object):  # pylint: disable=R0902
     #: Tracks each time a Column instance is created. Used to retain order.
     creation_counter = 0
     empty_values = (None, '')
+    #: Loads the values of the column for many records at once (see
+    #: :ref:`table.load_foo`). Subclasses can implement it as a method that
+    #: takes a list of records. `None` means the *accessor* is used instead.
+    load = None
 
     def __init__(self, verbose_name=None, accessor=None, default=None,
                  visible=True, orderable=None, attrs=None, order_by=None,
-                 sortable=None, empty_values=None):
+                 sortable=None, empty_values=None, footer=None):
         if not (accessor is None or isinstance(accessor, basestring) or
                 callable(accessor)):
             raise TypeError('accessor must be a string or callable, not %s' %
@@ -155,6 +169,7 @@ class Column(object):  # pylint: disable=R0902
         self.order_by = OrderByTuple(order_by) if order_by is not None else None
         if empty_values is not None:
             self.empty_values = empty_values
+        self.footer = footer
 
         self.creation_counter = Column.creation_counter
         Column.creation_counter += 1
@@ -321,6 +336,15 @@ class BoundColumn(object):
             value = self.table.default
         return value
 
+    @property
+    def footer(self):
+        """
+        The value of the column's footer aggregate (see `.Column.footer`), or
+        an empty string if it doesn't have one.
+        """
+        value = self.table.data.footer.get(self.name)
+        return "" if value is None else value
+
     @property
     def header(self):
         """
@@ -506,6 +530,7 @@ class BoundColumns(object):
         for name, column in table.base_columns.iteritems():
             self.columns[name] = bc = BoundColumn(table, column, name)
             bc.render = getattr(table, 'render_' + name, column.render)
+            bc.load = getattr(table, 'load_' + name, column.load)
 
     def iternames(self):
         return (name for name, column in self.iteritems())
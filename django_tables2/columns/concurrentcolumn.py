@@ -0,0 +1,108 @@
+# coding: utf-8
+from __future__ import absolute_import, unicode_literals
+from django.db import connections
+from django.utils import translation
+import logging
+import threading
+import time
+from .base import Column
+
+
+logger = logging.getLogger("django_tables2")
+
+
+class LoaderThread(threading.Thread):
+    """
+    Calls a column's loader with a batch of records in a background thread.
+    """
+    def __init__(self, load, records, name=None):
+        super(LoaderThread, self).__init__(name=name)
+        self.daemon = True
+        self.load = load
+        self.records = records
+        self.language = translation.get_language()
+        self.values = None
+        self.failed = False
+
+    def run(self):
+        translation.activate(self.language)
+        try:
+            self.values = self.load(self.records)
+        except Exception:
+            self.failed = True
+            logger.exception("Loading %s failed", self.name)
+        finally:
+            translation.deactivate()
+            # The thread's connections aren't closed otherwise.
+            for connection in connections.all():
+                connection.close()
+
+
+class ConcurrentColumn(Column):
+    """
+    A column whose values are loaded for all of the rows of a page at once
+    (see :ref:`table.load_foo`), concurrently with the other concurrent
+    columns of the table. This suits values that come from slow services:
+    the page waits for the slowest loader rather than for all of them in
+    turn.
+
+    :param   loader: callable that's given a list of records and returns a
+                     `dict` mapping the primary key of each record to its
+                     value. A ``load_FOO`` method on the table can be used
+                     instead.
+    :type    loader: callable
+    :param  timeout: maximum number of seconds to wait for the loader
+                     (default: no limit)
+    :type   timeout: `float`
+    :param fallback: value of every cell if the loader raises an exception
+                     or times out (default: `None`, i.e. the column's
+                     *default*)
+
+    Each loader is called in its own thread. A loader that times out is left
+    to finish in the background, and its values are discarded. Errors are
+    logged to the ``django_tables2`` logger.
+
+    Example:
+
+    .. code-block:: python
+
+        def load_ratings(people):
+            return ratings_service.get_many([person.pk for person in people])
+
+        class PeopleTable(tables.Table):
+            name = tables.Column()
+            rating = tables.ConcurrentColumn(load_ratings, timeout=0.5,
+                                             fallback="n/a")
+    """
+    def __init__(self, loader=None, timeout=None, fallback=None, **extra):
+        super(ConcurrentColumn, self).__init__(**extra)
+        self.loader = loader
+        self.timeout = timeout
+        self.fallback = fallback
+
+    def load(self, records):
+        return self.loader(records) if self.loader is not None else {}
+
+    def start_loading(self, load, records, name=None):
+        """
+        Start calling *load* (the column's loader) with *records* in a
+        background thread.
+
+        :returns: a function that waits for the loader (until the timeout)
+                  and returns the values it loaded, or `None` if it failed
+        """
+        thread = LoaderThread(load, records, name=name)
+        started = time.time()
+        thread.start()
+
+        def values():
+            if self.timeout is None:
+                thread.join()
+            else:
+                thread.join(max(0, started + self.timeout - time.time()))
+            if thread.is_alive():
+                logger.warning("Loading %s timed out after %s seconds",
+                               name, self.timeout)
+                return None
+            return None if thread.failed else thread.values
+        return values
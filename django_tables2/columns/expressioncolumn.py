@@ -0,0 +1,52 @@
+# coding: utf-8
+from __future__ import absolute_import, unicode_literals
+from .base import Column
+
+
+class ExpressionColumn(Column):
+    """
+    A column whose values are computed by the database, from an aggregate or
+    a SQL expression that's added to the table's queryset. Ordering the
+    table by the column is done by the database as well.
+
+    :param expression: an aggregate (e.g. ``Count("people")``), which is
+                       added using `~django.db.models.query.QuerySet.annotate`,
+                       or a SQL expression (e.g. ``"price * quantity"``),
+                       which is added using
+                       `~django.db.models.query.QuerySet.extra`
+    :param     params: parameters of a SQL expression's ``%s`` placeholders
+
+    The value is selected as the column's name, so it's available to
+    :ref:`table.render_FOO` methods as *value* and as an attribute of the
+    records. Tables of data that isn't a queryset show the column's default.
+
+    Example:
+
+    .. code-block:: python
+
+        class OccupationTable(tables.Table):
+            name = tables.Column()
+            population = tables.ExpressionColumn(Count("people"))
+            code = tables.ExpressionColumn("UPPER(name) || %s", params=["!"])
+    """
+    def __init__(self, expression, params=None, **extra):
+        super(ExpressionColumn, self).__init__(**extra)
+        self.expression = expression
+        self.params = params or ()
+
+    def annotate(self, queryset, name):
+        """
+        Return *queryset* with the column's value selected as *name*.
+        """
+        query = queryset.query
+        annotations = getattr(query, "annotations", None)
+        if annotations is None:
+            # Django < 1.8
+            annotations = query.aggregates
+        if name in annotations or name in query.extra:
+            # e.g. the queryset of another table of this class
+            return queryset
+        if isinstance(self.expression, basestring):
+            return queryset.extra(select={name: self.expression},
+                                  select_params=self.params)
+        return queryset.annotate(**{name: self.expression})
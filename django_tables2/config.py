@@ -1,5 +1,6 @@
 # coding: utf-8
 from django.core.paginator import EmptyPage, PageNotAnInteger
+from .timings import track_table
 
 
 class RequestConfig(object):
@@ -32,6 +33,7 @@ class RequestConfig(object):
         """
         Configure a table using information from the request.
         """
+        track_table(self.request, table)
         order_by = self.request.GET.getlist(table.prefixed_order_by_field)
         if order_by:
             table.order_by = order_by
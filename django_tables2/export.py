@@ -0,0 +1,459 @@
+# coding: utf-8
+from __future__ import absolute_import, unicode_literals
+from django.utils.datastructures import SortedDict
+from django.utils.encoding import force_unicode
+from django.utils.html import escape, strip_tags
+from django.utils.safestring import SafeData
+import csv
+import datetime
+import decimal
+import json
+import math
+import os
+import re
+import tempfile
+import zipfile
+
+try:
+    from django.utils import timezone
+except ImportError:
+    # Django < 1.4
+    timezone = None
+
+try:
+    from html import unescape
+except ImportError:
+    from HTMLParser import HTMLParser
+    unescape = HTMLParser().unescape
+
+
+def html_to_text(value):
+    """
+    Convert a rendered cell value to plain text.
+
+    Rendered values that are safe HTML (e.g. the output of
+    `.BooleanColumn` or `.LinkColumn`) have their tags stripped and entities
+    decoded, anything else is just converted to unicode.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, SafeData):
+        return unescape(strip_tags(value))
+    return force_unicode(value)
+
+
+class TableExport(object):
+    """
+    Base class for exporting the rows of a table.
+
+    :type  table: `.Table` object
+    :param table: the table to export
+    :type    raw: `bool`
+    :param   raw: use the values from the data (via each column's accessor)
+                  rather than the rendered values, so :ref:`table.render_FOO`
+                  methods and `.Column.render` are skipped (default:
+                  `raw_by_default`)
+
+    The visible columns of the table are exported, using their headers.
+    Subclasses implement `__iter__` to yield the exported content in chunks.
+
+    Rows are read from `.Table.rows` one at a time, so memory usage stays
+    constant irrespective of the number of rows (querysets are iterated
+    without being cached, see `.Table.Meta.iterator_chunk_size`).
+    """
+    content_type = None
+    extension = None
+    #: If `True`, only the current page is exported (if the table is
+    #: paginated), otherwise all rows are exported.
+    paginated = False
+    #: If `True`, the export is made of a head followed by a line per row,
+    #: rendered by `render_head` and `render_row`.
+    line_based = False
+    #: If `True`, the values from the data are exported unless *raw* is
+    #: `False`.
+    raw_by_default = False
+
+    def __init__(self, table, raw=None):
+        self.table = table
+        self.raw = self.raw_by_default if raw is None else raw
+
+    def __iter__(self):
+        raise NotImplementedError
+
+    @property
+    def columns(self):
+        return self.table.columns.visible()
+
+    def headers(self):
+        """
+        Return a list of the column headers as plain text.
+        """
+        return [html_to_text(column.header) for column in self.columns]
+
+    def values(self, row):
+        """
+        Return the list of values for a `.BoundRow`.
+        """
+        if self.raw:
+            return [row.get_cell_value(column.name) for column in self.columns]
+        return [row[column.name] for column in self.columns]
+
+    def bound_rows(self):
+        """
+        Yield the `.BoundRow` objects to export.
+        """
+        page = getattr(self.table, "page", None)
+        if self.paginated and page is not None:
+            for row in page.object_list:
+                yield row
+            return
+        with self.table.data.chunked():
+            for row in self.table.rows:
+                yield row
+
+    def rows(self):
+        """
+        Return an iterator yielding the list of values for each row.
+        """
+        for row in self.bound_rows():
+            yield self.values(row)
+
+
+class Echo(object):
+    """
+    A file-like object whose ``write`` method returns what it's given, used
+    to get lines from `csv.writer` without buffering them.
+    """
+    def write(self, value):
+        return value
+
+
+class CSVExport(TableExport):
+    """
+    Exports a table as CSV, one line per chunk (the first being the headers).
+
+    Values are encoded as UTF-8.
+    """
+    content_type = "text/csv"
+    extension = "csv"
+
+    line_based = True
+
+    def __init__(self, table, raw=False):
+        super(CSVExport, self).__init__(table, raw=raw)
+        self.writer = csv.writer(Echo())
+
+    def __iter__(self):
+        yield self.render_head()
+        for row in self.bound_rows():
+            yield self.render_row(row)
+
+    def render_head(self):
+        return self.writer.writerow(self.encode(self.headers()))
+
+    def render_row(self, row):
+        return self.writer.writerow(self.encode(self.values(row)))
+
+    def encode(self, values):
+        convert = force_unicode if self.raw else html_to_text
+        return [("" if value is None else convert(value)).encode("utf-8")
+                for value in values]
+
+
+class JSONEncoder(json.JSONEncoder):
+    """
+    Encodes dates, times and decimals as strings, and falls back to unicode
+    for anything else that JSON doesn't support (e.g. model instances).
+    """
+    def default(self, o):  # pylint: disable=E0202
+        if isinstance(o, (datetime.date, datetime.time)):
+            return o.isoformat()
+        if isinstance(o, decimal.Decimal):
+            return str(o)
+        return force_unicode(o)
+
+
+class BaseJSONExport(TableExport):
+    def objects(self):
+        """
+        Return an iterator yielding a `dict` for each row, keyed by column
+        name.
+        """
+        for row in self.bound_rows():
+            yield self.as_object(row)
+
+    def as_object(self, row):
+        """
+        Return a `dict` of a `.BoundRow`'s values, keyed by column name.
+        """
+        values = self.values(row)
+        if not self.raw:
+            values = [html_to_text(value) for value in values]
+        return SortedDict(zip([column.name for column in self.columns], values))
+
+    def dumps(self, obj):
+        return json.dumps(obj, cls=JSONEncoder, separators=(",", ":"))
+
+
+class JSONExport(BaseJSONExport):
+    """
+    Exports the current page of a table as a JSON object, e.g.:
+
+    .. code-block:: javascript
+
+        {"columns": [{"name": "name", "header": "Name", "orderable": true}],
+         "rows": [{"name": "Germany"}, {"name": "France"}],
+         "page": 1,
+         "total": 2}
+
+    *page* is the current page number, or ``null`` if the table isn't
+    paginated, in which case all rows are exported. *total* is the total
+    number of rows.
+    """
+    content_type = "application/json"
+    extension = "json"
+    paginated = True
+
+    def __iter__(self):
+        yield self.dumps(self.as_dict())
+
+    def as_dict(self):
+        page = getattr(self.table, "page", None)
+        columns = [SortedDict((("name", column.name),
+                               ("header", html_to_text(column.header)),
+                               ("orderable", column.orderable)))
+                   for column in self.columns]
+        rows = list(self.objects())
+        return SortedDict((
+            ("columns", columns),
+            ("rows", rows),
+            ("page", page.number if page is not None else None),
+            ("total", page.paginator.count if page is not None else len(rows)),
+        ))
+
+
+class NDJSONExport(BaseJSONExport):
+    """
+    Exports a table as newline delimited JSON, i.e. a line containing a JSON
+    object (keyed by column name) for each row.
+    """
+    content_type = "application/x-ndjson"
+    extension = "ndjson"
+    line_based = True
+
+    def __iter__(self):
+        for row in self.bound_rows():
+            yield self.render_row(row)
+
+    def render_head(self):
+        return ""
+
+    def render_row(self, row):
+        return self.dumps(self.as_object(row)) + "\n"
+
+
+XLSX_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">\
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>\
+<Default Extension="xml" ContentType="application/xml"/>\
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>\
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>\
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>\
+</Types>"""
+
+XLSX_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>\
+</Relationships>"""
+
+XLSX_WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" \
+xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">\
+<sheets><sheet name="%s" sheetId="1" r:id="rId1"/></sheets>\
+</workbook>"""
+
+XLSX_WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>\
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>\
+</Relationships>"""
+
+# Cell styles (by index): 0 default, 1 date, 2 date & time, 3 time, 4 header
+XLSX_STYLES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">\
+<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>\
+<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>\
+<fills count="2"><fill><patternFill patternType="none"/></fill>\
+<fill><patternFill patternType="gray125"/></fill></fills>\
+<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>\
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>\
+<cellXfs count="5">\
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>\
+<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>\
+<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>\
+<xf numFmtId="21" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>\
+<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>\
+</cellXfs>\
+<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>\
+</styleSheet>"""
+
+XLSX_SHEET_START = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>"""
+
+XLSX_SHEET_END = "</sheetData></worksheet>"
+
+# Characters that aren't allowed in XML documents
+RE_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+RE_SHEET_NAME_ILLEGAL = re.compile(r"[\[\]:*?/\\]")
+EXCEL_EPOCH = datetime.datetime(1899, 12, 30)
+
+
+def is_finite(number):
+    """
+    Return `False` if *number* is NaN or infinite.
+    """
+    if isinstance(number, decimal.Decimal):
+        return number.is_finite()
+    return not (isinstance(number, float)
+                and (math.isnan(number) or math.isinf(number)))
+
+
+def column_letter(index):
+    """
+    Return the spreadsheet column name (``A``, ``B``, ... ``AA``) for a
+    0-indexed column.
+    """
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+class XLSXExport(TableExport):
+    """
+    Exports a table as an Excel (Office Open XML) workbook.
+
+    :param chunk_size: size of the chunks (in bytes) the workbook is yielded
+                       in
+
+    The worksheet is written to a temporary file a row at a time, and then
+    compressed into the workbook (also a temporary file), so the workbook is
+    never held in memory.
+
+    Numbers, booleans, dates and times are written as native cells, anything
+    else (including NaN and infinite numbers) is written as text. The values
+    are taken from the data by default, since rendered values are often text
+    (e.g. `.DateColumn`); use ``raw=False`` to export the rendered values.
+    """
+    content_type = ("application/vnd.openxmlformats-officedocument."
+                    "spreadsheetml.sheet")
+    extension = "xlsx"
+    raw_by_default = True
+
+    def __init__(self, table, raw=None, chunk_size=64 * 1024):
+        super(XLSXExport, self).__init__(table, raw=raw)
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        handle, sheet_path = tempfile.mkstemp(suffix=".xml")
+        try:
+            with os.fdopen(handle, "wb") as sheet:
+                self.write_sheet(sheet)
+            with tempfile.TemporaryFile() as workbook:
+                self.write_workbook(workbook, sheet_path)
+                workbook.seek(0)
+                while True:
+                    chunk = workbook.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            os.remove(sheet_path)
+
+    @property
+    def sheet_name(self):
+        name = RE_SHEET_NAME_ILLEGAL.sub("", force_unicode(
+                self.table.data.verbose_name_plural))
+        return name[:31] or "Sheet1"
+
+    def write_workbook(self, workbook, sheet_path):
+        """
+        Write the workbook to the file object *workbook*, using the worksheet
+        at *sheet_path*.
+        """
+        archive = zipfile.ZipFile(workbook, "w", zipfile.ZIP_DEFLATED)
+        try:
+            archive.writestr("[Content_Types].xml", XLSX_CONTENT_TYPES)
+            archive.writestr("_rels/.rels", XLSX_RELS)
+            archive.writestr("xl/workbook.xml", (XLSX_WORKBOOK
+                             % escape(self.sheet_name)).encode("utf-8"))
+            archive.writestr("xl/_rels/workbook.xml.rels", XLSX_WORKBOOK_RELS)
+            archive.writestr("xl/styles.xml", XLSX_STYLES)
+            archive.write(sheet_path, "xl/worksheets/sheet1.xml")
+        finally:
+            archive.close()
+
+    def write_sheet(self, sheet):
+        """
+        Write the worksheet XML to the file object *sheet*.
+        """
+        letters = [column_letter(i) for i in range(len(self.columns))]
+        sheet.write(XLSX_SHEET_START.encode("utf-8"))
+        sheet.write(self.row_xml(1, letters, self.headers(), style=4))
+        for number, values in enumerate(self.rows(), 2):
+            sheet.write(self.row_xml(number, letters, values))
+        sheet.write(XLSX_SHEET_END.encode("utf-8"))
+
+    def row_xml(self, number, letters, values, style=None):
+        """
+        Return the (encoded) XML for a row of the worksheet.
+        """
+        cells = []
+        for letter, value in zip(letters, values):
+            cell = self.cell_xml(value, style)
+            if cell is not None:
+                cells.append('<c r="%s%d"%s' % (letter, number, cell))
+        return ('<row r="%d">%s</row>' % (number, "".join(cells))).encode("utf-8")
+
+    def cell_xml(self, value, style=None):
+        """
+        Return the XML for a cell (following its reference), or `None` if the
+        cell should be left empty.
+        """
+        if value is None:
+            return None
+        if isinstance(value, bool):
+            return ' t="b"><v>%d</v></c>' % value
+        if (isinstance(value, (int, long, float, decimal.Decimal))
+                and is_finite(value)):
+            return "><v>%s</v></c>" % value
+        if isinstance(value, datetime.datetime):
+            if timezone and timezone.is_aware(value):
+                value = timezone.localtime(value)
+            value = value.replace(tzinfo=None) - EXCEL_EPOCH
+            serial = value.days + value.seconds / 86400.0 + value.microseconds / 8.64e10
+            return ' s="2"><v>%r</v></c>' % serial
+        if isinstance(value, datetime.date):
+            serial = (datetime.datetime(value.year, value.month, value.day)
+                      - EXCEL_EPOCH).days
+            return ' s="1"><v>%d</v></c>' % serial
+        if isinstance(value, datetime.time):
+            seconds = value.hour * 3600 + value.minute * 60 + value.second
+            serial = seconds / 86400.0 + value.microsecond / 8.64e10
+            return ' s="3"><v>%r</v></c>' % serial
+        text = force_unicode(value) if self.raw else html_to_text(value)
+        text = escape(RE_XML_ILLEGAL.sub("", text))
+        style = ' s="%d"' % style if style is not None else ""
+        return '%s t="inlineStr"><is><t xml:space="preserve">%s</t></is></c>' % (
+            style, text)
+
+
+#: The available export formats, keyed by name.
+formats = {
+    "csv": CSVExport,
+    "json": JSONExport,
+    "ndjson": NDJSONExport,
+    "xlsx": XLSXExport,
+}
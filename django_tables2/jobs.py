@@ -0,0 +1,254 @@
+# coding: utf-8
+"""
+Exports that run in the background, writing to a file, and that can be
+resumed if they're interrupted.
+"""
+from __future__ import absolute_import, unicode_literals
+from django.db import connections
+import json
+import os
+import re
+import tempfile
+import threading
+import traceback
+import uuid
+import zlib
+from .export import formats
+from .parallel import table_kwargs
+
+
+#: Default directory that export jobs write to.
+DEFAULT_DIRECTORY = os.path.join(tempfile.gettempdir(), "django_tables2-exports")
+
+RE_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+PENDING = "pending"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+
+
+class ExportJob(object):
+    """
+    Exports a table of a queryset to a file, recording its progress in a
+    state file so it can be monitored, and resumed if it's interrupted.
+
+    :type            table: `.Table` object
+    :param           table: the table to export, its data must be a queryset
+    :type           format: `unicode`
+    :param          format: name of the export format, ``csv`` or ``ndjson``
+    :type              raw: `bool`
+    :param             raw: export the values from the data rather than the
+                            rendered values
+    :type           job_id: `unicode`
+    :param          job_id: identifies the job, pass the id of an existing job
+                            to resume it (default: a new random id)
+    :type        directory: `unicode`
+    :param       directory: where the export and state files are written
+                            (default: `.DEFAULT_DIRECTORY`)
+    :type checkpoint_every: `int`
+    :param checkpoint_every: number of rows written between updates of the
+                             state file
+    :type             gzip: `int`
+    :param            gzip: if not `None`, the export is compressed with gzip
+                            using this compression level (``1`` to ``9``)
+
+    The export is written to ``<job_id>.<extension>`` and the state to
+    ``<job_id>.json``, which contains the number of rows written and the
+    primary key of the last one. Rows are exported in primary key order, so
+    if the job is interrupted it can continue after the last row that was
+    recorded (any output written after that is discarded). Compressed
+    exports (``<job_id>.<extension>.gz``) are written as a gzip member per
+    checkpoint, so they can be resumed in the same way.
+
+    `start` runs the job in a background thread, `run` runs it in the current
+    thread (e.g. in a task queue's worker):
+
+    .. code-block:: python
+
+        job = ExportJob(PeopleTable(Person.objects.all()), "csv")
+        job.start()
+        return redirect("export-status", job_id=job.job_id)
+    """
+    def __init__(self, table, format="csv", raw=False, job_id=None,
+                 directory=None, checkpoint_every=1000, gzip=None):
+        export_class = formats[format]
+        if not export_class.line_based:
+            raise ValueError("%r exports can't be resumed" % format)
+        if not hasattr(table.data, "queryset"):
+            raise ValueError("only tables of querysets can be exported by a job")
+        if job_id is not None and not RE_JOB_ID.match(job_id):
+            raise ValueError("invalid job id %r" % job_id)
+        self.table = table
+        self.format = format
+        self.raw = raw
+        self.job_id = job_id or uuid.uuid4().hex
+        self.directory = directory or DEFAULT_DIRECTORY
+        self.checkpoint_every = checkpoint_every
+        self.gzip = gzip
+        self.compressor = None
+        self.thread = None
+
+    @property
+    def path(self):
+        filename = "%s.%s" % (self.job_id, formats[self.format].extension)
+        if self.gzip is not None:
+            filename += ".gz"
+        return os.path.join(self.directory, filename)
+
+    @property
+    def content_type(self):
+        if self.gzip is not None:
+            return "application/gzip"
+        return formats[self.format].content_type
+
+    @property
+    def state_path(self):
+        return state_path(self.job_id, self.directory)
+
+    @property
+    def state(self):
+        """
+        The last recorded state of the job (a `dict`), or `None` if the job
+        hasn't started.
+        """
+        return load_state(self.job_id, self.directory)
+
+    def start(self):
+        """
+        Run the job in a background (daemon) thread.
+
+        :returns: the `threading.Thread` running the job
+        """
+        self.save_state(self.state or {"status": PENDING, "rows": 0})
+        self.thread = threading.Thread(target=self.run_and_close,
+                                       name="export-%s" % self.job_id)
+        self.thread.daemon = True
+        self.thread.start()
+        return self.thread
+
+    def run_and_close(self):
+        try:
+            self.run()
+        finally:
+            # The thread's connections aren't closed otherwise.
+            for connection in connections.all():
+                connection.close()
+
+    def run(self):
+        """
+        Run the job (in the current thread), resuming it if it was
+        interrupted. Does nothing if the job has already finished.
+        """
+        state = self.state or {}
+        if state.get("status") == FINISHED:
+            return
+        queryset = self.table.data.queryset.order_by("pk")
+        state.update({
+            "status": RUNNING,
+            "format": self.format,
+            "filename": os.path.basename(self.path),
+            "content_type": self.content_type,
+            "rows": state.get("rows", 0),
+            "total": queryset.count(),
+            "error": None,
+        })
+        self.save_state(state)
+        try:
+            self.write(queryset, state)
+        except Exception:
+            # Keep the position of the last checkpoint, so the job can resume.
+            state = self.state
+            state.update(status=FAILED, error=traceback.format_exc())
+            self.save_state(state)
+            raise
+
+    def write(self, queryset, state):
+        """
+        Export the rows following ``state["last_pk"]`` to the end of the
+        output file, checkpointing the state as it goes.
+        """
+        resuming = state.get("last_pk") is not None
+        if resuming:
+            queryset = queryset.filter(pk__gt=state["last_pk"])
+        table = type(self.table)(queryset, **table_kwargs(self.table))
+        # The table's Meta.order_by may have reordered the rows, but resuming
+        # relies on them being in primary key order.
+        table.data.queryset = table.data.queryset.order_by("pk")
+        table.data._python_ordering = None
+        export = formats[self.format](table, raw=self.raw)
+        self.compressor = None
+        with open(self.path, "r+b" if resuming else "wb") as output:
+            if resuming:
+                # Discard anything written after the last checkpoint.
+                output.truncate(state["size"])
+                output.seek(state["size"])
+            else:
+                self.write_chunk(output, export.render_head())
+            with table.data.chunked():
+                for row in table.rows:
+                    self.write_chunk(output, export.render_row(row))
+                    state["rows"] += 1
+                    state["last_pk"] = row.record.pk
+                    if state["rows"] % self.checkpoint_every == 0:
+                        self.checkpoint(output, state)
+            state["status"] = FINISHED
+            self.checkpoint(output, state)
+
+    def write_chunk(self, output, chunk):
+        chunk = encode(chunk)
+        if self.gzip is not None:
+            if self.compressor is None:
+                self.compressor = zlib.compressobj(self.gzip, zlib.DEFLATED,
+                                                   16 + zlib.MAX_WBITS)
+            chunk = self.compressor.compress(chunk)
+        output.write(chunk)
+
+    def checkpoint(self, output, state):
+        """
+        Make sure the output written so far is on disk, and then record the
+        state.
+        """
+        if self.compressor is not None:
+            # End the gzip member, the next chunk starts a new one.
+            output.write(self.compressor.flush())
+            self.compressor = None
+        output.flush()
+        os.fsync(output.fileno())
+        state["size"] = output.tell()
+        self.save_state(state)
+
+    def save_state(self, state):
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        state["id"] = self.job_id
+        temp = self.state_path + ".tmp"
+        with open(temp, "wb") as f:
+            f.write(json.dumps(state).encode("utf-8"))
+        # Renaming is atomic, so a crash never leaves half a state file.
+        os.rename(temp, self.state_path)
+
+
+def encode(value):
+    return value.encode("utf-8") if not isinstance(value, bytes) else value
+
+
+def state_path(job_id, directory=None):
+    """
+    Return the path of the state file of an `.ExportJob`.
+    """
+    if not RE_JOB_ID.match(job_id or ""):
+        raise ValueError("invalid job id %r" % job_id)
+    return os.path.join(directory or DEFAULT_DIRECTORY, "%s.json" % job_id)
+
+
+def load_state(job_id, directory=None):
+    """
+    Return the state (a `dict`) of an `.ExportJob`, or `None` if there's no
+    job with the given id.
+    """
+    try:
+        with open(state_path(job_id, directory), "rb") as f:
+            return json.loads(f.read().decode("utf-8"))
+    except IOError:
+        return None
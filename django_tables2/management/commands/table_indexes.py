@@ -0,0 +1,182 @@
+# coding: utf-8
+from __future__ import absolute_import, unicode_literals
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.models.fields import FieldDoesNotExist
+from django.utils.importlib import import_module
+from django.utils.module_loading import module_has_submodule
+from optparse import make_option
+from ...tables import Table
+from ...utils import Accessor, OrderBy, OrderByTuple
+
+
+def table_classes(modules):
+    """
+    Return the `.Table` subclasses defined in *modules* (a list of module
+    names), ordered by module and name.
+    """
+    classes = []
+    pending = [Table]
+    while pending:
+        subclasses = pending.pop().__subclasses__()
+        classes.extend(cls for cls in subclasses if cls.__module__ in modules)
+        pending.extend(subclasses)
+    return sorted(set(classes), key=lambda cls: (modules.index(cls.__module__),
+                                                cls.__name__))
+
+
+def ordering_lookups(table_class):
+    """
+    Yield ``(column name, lookup)`` pairs for the accessors used to order
+    each of the table's orderable columns.
+    """
+    for name, column in table_class.base_columns.items():
+        orderable = column.orderable
+        if orderable is None:
+            orderable = table_class._meta.orderable
+        if not orderable:
+            continue
+        order_by = column.order_by
+        if order_by is None:
+            order_by = OrderByTuple((column.accessor or Accessor(name), ))
+        for accessor in order_by:
+            yield name, OrderBy(accessor).bare.replace(Accessor.SEPARATOR, "__")
+
+
+def resolve_field(model, lookup):
+    """
+    Return the ``(model, field)`` a lookup ends at (following relations), or
+    `None` if it isn't a path of model fields (e.g. it's a property).
+    """
+    bits = lookup.split("__")
+    for index, bit in enumerate(bits):
+        if bit == "pk":
+            field = model._meta.pk
+        else:
+            try:
+                field = model._meta.get_field_by_name(bit)[0]
+            except FieldDoesNotExist:
+                return None
+        if index == len(bits) - 1:
+            return (model, field) if hasattr(field, "column") else None
+        rel = getattr(field, "rel", None)
+        if rel is not None and getattr(rel, "to", None) is not None:
+            model = rel.to
+        elif hasattr(field, "field") and hasattr(field, "model"):
+            # reverse relation (RelatedObject)
+            model = field.model
+        else:
+            return None
+
+
+def has_index(model, field):
+    """
+    Return `True` if the database can use an index to order by *field*.
+    """
+    if field.primary_key or field.unique or field.db_index:
+        return True
+    # Django >= 1.5
+    for fields in getattr(model._meta, "index_together", ()):
+        if fields and fields[0] == field.name:
+            return True
+    return False
+
+
+def estimate_rows(model, connection):
+    """
+    Return the (estimated) number of rows in *model*'s table, using the
+    database's statistics where they're available rather than counting.
+    """
+    table = model._meta.db_table
+    cursor = connection.cursor()
+    if connection.vendor == "postgresql":
+        cursor.execute("SELECT reltuples FROM pg_class WHERE relname = %s",
+                       [table])
+    elif connection.vendor == "mysql":
+        cursor.execute("SELECT table_rows FROM information_schema.tables "
+                       "WHERE table_schema = DATABASE() AND table_name = %s",
+                       [table])
+    else:
+        cursor.execute("SELECT COUNT(*) FROM %s"
+                       % connection.ops.quote_name(table))
+    row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None else None
+
+
+def explain(queryset, connection):
+    """
+    Return the rows of the database's query plan for *queryset*.
+    """
+    sql, params = queryset.query.get_compiler(connection=connection).as_sql()
+    prefix = "EXPLAIN QUERY PLAN" if connection.vendor == "sqlite" else "EXPLAIN"
+    cursor = connection.cursor()
+    cursor.execute("%s %s" % (prefix, sql), params)
+    return cursor.fetchall()
+
+
+class Command(BaseCommand):
+    args = "[module ...]"
+    help = ("Reports the fields that orderable table columns are ordered by "
+            "that don't have a database index. Tables are looked for in the "
+            "given modules, or in the tables module of each installed app.")
+
+    option_list = BaseCommand.option_list + (
+        make_option("--database", action="store", dest="database",
+                    default=DEFAULT_DB_ALIAS,
+                    help="Nominates a database to estimate the number of rows "
+                         "in. Defaults to the \"default\" database."),
+        make_option("--explain", action="store_true", dest="explain",
+                    default=False,
+                    help="Show the query plan of ordering each of the tables "
+                         "by the fields without an index."),
+        make_option("--limit", action="store", dest="limit", type="int",
+                    default=25,
+                    help="Number of rows fetched by the queries that are "
+                         "explained (i.e. a page). Defaults to 25."),
+    )
+
+    def handle(self, *modules, **options):
+        if modules:
+            for module in modules:
+                try:
+                    import_module(module)
+                except ImportError as e:
+                    raise CommandError("Can't import %s: %s" % (module, e))
+        else:
+            modules = []
+            for app in settings.INSTALLED_APPS:
+                if module_has_submodule(import_module(app), "tables"):
+                    import_module("%s.tables" % app)
+                    modules.append("%s.tables" % app)
+        connection = connections[options.get("database", DEFAULT_DB_ALIAS)]
+        explaining = options.get("explain", False)
+        limit = options.get("limit", 25)
+        estimates = {}
+        missing = 0
+        for table_class in table_classes(list(modules)):
+            model = table_class._meta.model
+            if model is None:
+                continue
+            for name, lookup in ordering_lookups(table_class):
+                resolved = resolve_field(model, lookup)
+                if resolved is None:
+                    continue
+                field_model, field = resolved
+                if has_index(field_model, field):
+                    continue
+                missing += 1
+                if field_model not in estimates:
+                    estimates[field_model] = estimate_rows(field_model, connection)
+                rows = estimates[field_model]
+                self.stdout.write("%s.%s.%s: %s.%s has no index (%s rows)\n" % (
+                    table_class.__module__, table_class.__name__, name,
+                    field_model._meta.db_table, field.column,
+                    "unknown" if rows is None else "~%d" % rows))
+                if explaining:
+                    queryset = model._default_manager.order_by(lookup)[:limit]
+                    for row in explain(queryset, connection):
+                        self.stdout.write("    %s\n" % " ".join(
+                            "%s" % value for value in row))
+        if not missing:
+            self.stdout.write("Every orderable column's fields have an index.\n")
@@ -0,0 +1,120 @@
+# coding: utf-8
+from __future__ import absolute_import, unicode_literals
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from .rows import BoundRows
+from .utils import has_aggregates
+
+
+#: Name of the extra ``SELECT`` item that carries the total number of rows.
+WINDOW_COUNT_ALIAS = "_window_count"
+
+
+def supports_window_functions(connection):
+    """
+    Return `True` if the database behind *connection* supports
+    ``COUNT(*) OVER ()``.
+
+    :param connection: database connection (e.g. ``connections["default"]``)
+    :rtype: `bool`
+    """
+    # Newer versions of Django know the answer, so ask them first.
+    supported = getattr(connection.features, "supports_over_clause", None)
+    if supported is not None:
+        return supported
+    vendor = getattr(connection, "vendor", None)
+    if vendor == "sqlite":
+        try:
+            from sqlite3 import sqlite_version_info
+        except ImportError:
+            return False
+        return sqlite_version_info >= (3, 25, 0)
+    return vendor in ("postgresql", "oracle")
+
+
+class WindowCountPaginator(Paginator):
+    """
+    A paginator that retrieves the records for a page *and* the total number
+    of records using a single query.
+
+    The page query is annotated with ``COUNT(*) OVER ()``, and the total is
+    read from the first record that's returned. If the page is empty, or if
+    the data isn't a queryset that supports window functions, the standard
+    two query approach (``count()`` then the page slice) is used instead.
+
+    Use it by passing it as *klass* to `.Table.paginate`, or via
+    `.RequestConfig`:
+
+    .. code-block:: python
+
+        RequestConfig(request, paginate={"klass": WindowCountPaginator}).configure(table)
+
+    .. note::
+
+        Querysets using ``distinct()``, aggregate annotations (or a ``GROUP
+        BY``), or ``values()``, and querysets that have already been sliced
+        always use the standard approach, since the window would count the
+        wrong rows (or wouldn't be selected).
+    """
+    def page(self, number):
+        queryset = self._window_queryset()
+        if queryset is None:
+            return super(WindowCountPaginator, self).page(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        bottom = (number - 1) * self.per_page
+        # Fetch enough records to decide whether orphans belong on this page.
+        records = list(queryset[bottom:bottom + self.per_page + self.orphans])
+        if not records:
+            # There's no row to read the total from, fallback to a count()
+            # query and let Paginator decide if the page can be empty.
+            return super(WindowCountPaginator, self).page(number)
+        first = records[0]
+        self._count = (first[WINDOW_COUNT_ALIAS] if isinstance(first, dict)
+                       else getattr(first, WINDOW_COUNT_ALIAS))
+        # Newer versions of Django make Paginator.count a cached_property,
+        # which reads the instance's __dict__ rather than _count.
+        self.__dict__["count"] = self._count
+        if hasattr(getattr(self.object_list, "data", None), "queryset"):
+            # Save TableData from doing its own count() query.
+            self.object_list.data._length = self._count
+        number = self.validate_number(number)
+        top = bottom + self.per_page
+        if top + self.orphans >= self._count:
+            top = self._count
+        records = records[:top - bottom]
+        if isinstance(self.object_list, BoundRows):
+            records = BoundRows(records, table=self.object_list.table,
+                                memoize=True)
+        return Page(records, number, self)
+
+    def _window_queryset(self):
+        """
+        Return the queryset annotated with the window count, or `None` if the
+        data can't be paginated using a window function.
+        """
+        data = self.object_list
+        if isinstance(data, BoundRows):
+            data = data.data
+        if getattr(data, "_python_ordering", None) is not None:
+            # The records are sorted in Python, not by the queryset.
+            return None
+        queryset = getattr(data, "queryset", data)
+        query = getattr(queryset, "query", None)
+        if query is None or not hasattr(queryset, "extra"):
+            return None
+        if query.distinct or not query.can_filter():
+            return None
+        if getattr(queryset, "_fields", None) is not None:
+            # values() doesn't select extra columns added after it.
+            return None
+        if query.group_by is not None or has_aggregates(query):
+            # The window column would be added to the GROUP BY.
+            return None
+        if not supports_window_functions(connections[queryset.db]):
+            return None
+        return queryset.extra(select={WINDOW_COUNT_ALIAS: "COUNT(*) OVER ()"})
@@ -0,0 +1,337 @@
+# coding: utf-8
+"""
+Exports of large queryset tables that are spread over multiple processes.
+"""
+from __future__ import absolute_import, unicode_literals
+from django.db import connections
+from django.db.models import CharField, Max, Min, TextField
+from django.db.models.fields import FieldDoesNotExist
+from django.utils.encoding import force_unicode
+import functools
+import heapq
+import multiprocessing
+import os
+import shutil
+import tempfile
+from .export import formats
+from .utils import Accessor
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+
+# Whether NULL sorts before the other values in ascending order, for the
+# databases whose ordering can be reproduced when merging ordered shards.
+NULLS_FIRST = {
+    "sqlite": True,
+    "mysql": True,
+    "postgresql": False,
+    "oracle": False,
+}
+
+
+@functools.total_ordering
+class Descending(object):
+    """
+    Wraps a value so that it sorts in reverse.
+    """
+    __slots__ = ("value", )
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+def shard_ranges(low, high, count):
+    """
+    Split the (inclusive) range of primary keys *low* to *high* into *count*
+    contiguous ``(start, stop)`` ranges. *stop* is exclusive, except for the
+    last range where it's `None`.
+    """
+    size = max(1, -(-(high - low + 1) // count))  # ceiling division
+    starts = range(low, high + 1, size)
+    return [(start, start + size if i < len(starts) - 1 else None)
+            for i, start in enumerate(starts)]
+
+
+def sort_key(record, ordering, nulls_first=True):
+    """
+    Return a key that sorts *record* the same way the database does for
+    *ordering* (a list of ``order_by()`` lookups).
+
+    `None` sorts before the other values in ascending order if *nulls_first*
+    (as it does in SQLite and MySQL), after them otherwise (as it does in
+    PostgreSQL and Oracle).
+    """
+    key = []
+    for lookup in ordering:
+        descending = lookup.startswith("-")
+        value = Accessor(lookup.lstrip("-").replace("__", ".")).resolve(record)
+        item = (value is not None, value) if nulls_first else (value is None, value)
+        key.append(Descending(item) if descending else item)
+    return tuple(key)
+
+
+def lookup_field(model, lookup):
+    """
+    Return the model field an ``order_by()`` lookup ends at (following
+    relations), or `None` if it isn't a path of model fields (e.g. it's an
+    annotation).
+    """
+    field = None
+    for bit in lookup.lstrip("-").split("__"):
+        if model is None:
+            return None
+        if bit == "pk":
+            field = model._meta.pk
+        else:
+            try:
+                field = model._meta.get_field_by_name(bit)[0]
+            except FieldDoesNotExist:
+                return None
+        rel = getattr(field, "rel", None)
+        if rel is not None and getattr(rel, "to", None) is not None:
+            model = rel.to
+        elif hasattr(field, "field") and hasattr(field, "model"):
+            # reverse relation (RelatedObject)
+            model = field.model
+        else:
+            model = None
+    return field if hasattr(field, "column") else None
+
+
+def check_ordering(model, ordering, vendor):
+    """
+    Raise `ValueError` unless the rows of *model* ordered by *ordering* (a
+    list of ``order_by()`` lookups) on a database of *vendor* can be merged
+    in Python in the same order as the database sorts them.
+
+    Python compares strings by code point, which only SQLite's default
+    collation does too, so text can only be ordered by on SQLite. Lookups
+    that aren't model fields (e.g. annotations) are allowed on SQLite only
+    for the same reason.
+    """
+    if vendor not in NULLS_FIRST:
+        raise ValueError("ordered exports can't be merged on %s" % vendor)
+    if vendor == "sqlite":
+        return
+    for lookup in ordering:
+        field = lookup_field(model, lookup)
+        if field is None or isinstance(field, (CharField, TextField)):
+            raise ValueError("exports ordered by %r can't be merged in the "
+                             "database's order on %s" % (lookup, vendor))
+
+
+def table_kwargs(table):
+    """
+    Return the keyword arguments needed to build another instance of
+    *table*'s class with the same columns and ordering.
+    """
+    return {"exclude": table.exclude, "sequence": table.sequence,
+            "default": table.default, "order_by": table.order_by}
+
+
+def export_shard(task):
+    """
+    Export a shard of a table to a part file, used by the worker processes of
+    `.ParallelExport`.
+
+    If the export is ordered (*task* has an ``ordering``), the part file
+    contains a pickled ``(sort key, line)`` pair per row, otherwise it
+    contains the lines.
+    """
+    queryset = task["model"]._default_manager.using(task["using"]).all()
+    queryset.query = task["query"]
+    table = task["table_class"](queryset, **task["kwargs"])
+    export = formats[task["format"]](table, raw=task["raw"])
+    ordering = task["ordering"]
+    with open(task["path"], "wb") as part, table.data.chunked():
+        for row in table.rows:
+            line = export.render_row(row)
+            if isinstance(line, unicode):
+                line = line.encode("utf-8")
+            if ordering:
+                key = sort_key(row.record, ordering, task["nulls_first"])
+                pickle.dump((key, line), part,
+                            pickle.HIGHEST_PROTOCOL)
+            else:
+                part.write(line)
+    return task["path"]
+
+
+def read_keyed(path):
+    """
+    Yield the ``(sort key, line)`` pairs from a part file of an ordered
+    export.
+    """
+    with open(path, "rb") as part:
+        while True:
+            try:
+                yield pickle.load(part)
+            except EOFError:
+                return
+
+
+class ParallelExport(object):
+    """
+    Exports a table of a queryset using a pool of processes.
+
+    :type      table: `.Table` object
+    :param     table: the table to export, its data must be a queryset of a
+                      model with an integer primary key
+    :type     format: `unicode`
+    :param    format: name of the export format, ``csv`` or ``ndjson``
+    :type        raw: `bool`
+    :param       raw: export the values from the data rather than the
+                      rendered values
+    :type  processes: `int`
+    :param processes: number of worker processes (default: number of CPUs),
+                      ``1`` exports in the current process
+    :type     shards: `int`
+    :param    shards: number of primary key ranges the queryset is split into
+                      (default: *processes*)
+    :type chunk_size: `int`
+    :param chunk_size: size of the chunks (in bytes) of unordered exports
+
+    The queryset is split into shards by ranges of primary keys, and each
+    shard is exported by a worker that builds an instance of the same table
+    class (using the table's *exclude*, *sequence*, and *default*) for it.
+    Workers write to part files in a temporary directory, which are then
+    read back in order.
+
+    When the queryset is ordered (e.g. via `.Table.order_by`), each shard is
+    exported in that order and the shards are merged. The merge compares
+    the values in Python, so only orderings that compare the same way in
+    Python as in the database are allowed (see `.check_ordering`), and
+    tables that are ordered in Python (e.g. by a property) can't be
+    exported. Unordered exports are ordered by primary key.
+
+    Iterate over the export to get the output, e.g.:
+
+    .. code-block:: python
+
+        with open("people.csv", "wb") as f:
+            for chunk in ParallelExport(table, "csv", processes=8):
+                f.write(chunk)
+
+    .. note::
+
+        The workers import the table class, so it must be defined at module
+        level. Database connections are closed before the workers are
+        started so each one opens its own, which means an in-memory SQLite
+        database can only be exported with ``processes=1``.
+    """
+    def __init__(self, table, format="csv", raw=False, processes=None,
+                 shards=None, chunk_size=64 * 1024):
+        export_class = formats[format]
+        if not export_class.line_based:
+            raise ValueError("%r exports can't be split into shards" % format)
+        if not hasattr(table.data, "queryset"):
+            raise ValueError("only tables of querysets can be exported in parallel")
+        if table.data._python_ordering is not None:
+            raise ValueError("tables ordered in Python can't be exported in parallel")
+        self.table = table
+        self.format = format
+        self.raw = raw
+        self.processes = processes or multiprocessing.cpu_count()
+        self.shards = shards or self.processes
+        self.chunk_size = chunk_size
+        self.content_type = export_class.content_type
+        self.extension = export_class.extension
+        ordering = self.ordering
+        if ordering != ["pk"]:
+            queryset = table.data.queryset
+            check_ordering(queryset.model, ordering,
+                           connections[queryset.db].vendor)
+
+    @property
+    def ordering(self):
+        """
+        The ``order_by()`` lookups of the queryset, followed by ``pk`` to make
+        the order deterministic (and the merge possible).
+        """
+        query = self.table.data.queryset.query
+        ordering = list(query.order_by)
+        if not ordering and query.default_ordering:
+            ordering = list(query.model._meta.ordering)
+        ordering = [force_unicode(lookup) for lookup in ordering]
+        if "?" in ordering:
+            raise ValueError("randomly ordered querysets can't be merged")
+        return ordering + ["pk"] if "pk" not in ordering else ordering
+
+    def tasks(self, directory):
+        """
+        Return the tasks (`dict` objects) passed to `.export_shard`, one per
+        shard.
+        """
+        table = self.table
+        queryset = table.data.queryset
+        ordering = self.ordering
+        bounds = queryset.aggregate(low=Min("pk"), high=Max("pk"))
+        if bounds["low"] is None:
+            return []
+        queryset = queryset.order_by(*ordering)
+        kwargs = table_kwargs(table)
+        nulls_first = NULLS_FIRST.get(connections[queryset.db].vendor, True)
+        tasks = []
+        for i, (start, stop) in enumerate(shard_ranges(bounds["low"],
+                                                       bounds["high"],
+                                                       self.shards)):
+            shard = queryset.filter(pk__gte=start)
+            if stop is not None:
+                shard = shard.filter(pk__lt=stop)
+            tasks.append({
+                "table_class": type(table),
+                "model": queryset.model,
+                "using": queryset.db,
+                "query": shard.query,
+                "kwargs": kwargs,
+                "format": self.format,
+                "raw": self.raw,
+                # Unordered exports are in pk order once concatenated.
+                "ordering": ordering if ordering != ["pk"] else None,
+                "nulls_first": nulls_first,
+                "path": os.path.join(directory, "part-%05d" % i),
+            })
+        return tasks
+
+    def __iter__(self):
+        head = formats[self.format](self.table, raw=self.raw).render_head()
+        if head:
+            yield head
+        directory = tempfile.mkdtemp(prefix="django_tables2-")
+        pool = None
+        try:
+            tasks = self.tasks(directory)
+            if self.processes == 1 or len(tasks) <= 1:
+                paths = (export_shard(task) for task in tasks)
+            else:
+                # Connections can't be shared with the workers.
+                for connection in connections.all():
+                    connection.close()
+                pool = multiprocessing.Pool(min(self.processes, len(tasks)))
+                paths = pool.imap(export_shard, tasks)
+            if tasks and tasks[0]["ordering"]:
+                paths = list(paths)
+                merged = heapq.merge(*[read_keyed(path) for path in paths])
+                for key, line in merged:
+                    yield line
+            else:
+                for path in paths:
+                    with open(path, "rb") as part:
+                        while True:
+                            chunk = part.read(self.chunk_size)
+                            if not chunk:
+                                break
+                            yield chunk
+        finally:
+            if pool is not None:
+                pool.terminate()
+            shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,182 @@
+# coding: utf-8
+"""
+Recording of the SQL queries executed while a table is rendered, to find the
+tables that execute a query per row (e.g. for a related object that isn't
+fetched with ``select_related()``).
+"""
+from __future__ import absolute_import, unicode_literals
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connections
+from django.utils.datastructures import SortedDict
+import re
+import warnings
+
+
+RE_STRING = re.compile(r"'(?:[^']|'')*'")
+RE_NUMBER = re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?\b")
+RE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+RE_SPACE = re.compile(r"\s+")
+
+
+class QueryBudgetWarning(RuntimeWarning):
+    """
+    Issued (in debug mode) when rendering a table executes more queries than
+    its `.Table.Meta.query_budget`. Use a warnings filter to raise it as an
+    exception instead, e.g. ``warnings.simplefilter("error",
+    QueryBudgetWarning)``.
+    """
+
+
+def normalize(sql):
+    """
+    Return *sql* with its literal values replaced by ``?`` (and lists of them
+    by ``(...)``), so the queries that only differ by their parameters (e.g.
+    the primary key of a related object) are the same.
+    """
+    sql = RE_STRING.sub("?", sql)
+    sql = RE_NUMBER.sub("?", sql)
+    sql = RE_LIST.sub("(...)", sql)
+    return RE_SPACE.sub(" ", sql).strip()
+
+
+class QueryStats(object):
+    """
+    The SQL queries executed while a table was rendered, see
+    `.Table.query_stats`.
+
+    :param queries: the SQL of the queries, in the order they were executed
+    :type  queries: `list` of `unicode`
+    """
+    def __init__(self, queries=None):
+        self.queries = queries if queries is not None else []
+
+    def __len__(self):
+        return len(self.queries)
+
+    @property
+    def patterns(self):
+        """
+        The number of times each query was executed, ignoring its parameters
+        (see `normalize`), as a `~django.utils.datastructures.SortedDict`
+        keyed by normalized SQL, in the order the queries were first
+        executed.
+        """
+        patterns = SortedDict()
+        for sql in self.queries:
+            pattern = normalize(sql)
+            patterns[pattern] = patterns.get(pattern, 0) + 1
+        return patterns
+
+    def repeated(self):
+        """
+        Return ``(pattern, count)`` pairs of the queries that were executed
+        more than once, e.g. once per row, most frequent first.
+        """
+        repeated = [(pattern, count) for pattern, count in self.patterns.items()
+                    if count > 1]
+        return sorted(repeated, key=lambda item: -item[1])
+
+    def __unicode__(self):
+        lines = ["%d queries" % len(self)]
+        for pattern, count in self.repeated():
+            lines.append("%d x %s" % (count, pattern))
+        return "\n".join(lines)
+
+    def __str__(self):
+        return unicode(self).encode("utf-8")
+
+
+def debug_cursor_attribute(connection):
+    # Django >= 1.8 renamed use_debug_cursor
+    if hasattr(connection, "force_debug_cursor"):
+        return "force_debug_cursor"
+    return "use_debug_cursor"
+
+
+@contextmanager
+def record_queries():
+    """
+    Record the queries executed (on any database) within the block, and
+    provide them as a `.QueryStats`, which is filled in when the block is
+    left. The queries are recorded even if ``settings.DEBUG`` is off, but
+    they're only kept in ``connection.queries`` if it's on.
+
+    .. code-block:: python
+
+        with record_queries() as stats:
+            html = table.as_html()
+        print stats.repeated()
+    """
+    stats = QueryStats()
+    state = []
+    for connection in connections.all():
+        attribute = debug_cursor_attribute(connection)
+        log = getattr(connection, "queries_log", connection.queries)
+        state.append((connection, attribute, getattr(connection, attribute), log,
+                      len(log)))
+        setattr(connection, attribute, True)
+    try:
+        yield stats
+    finally:
+        for connection, attribute, debug_cursor, log, start in state:
+            stats.queries.extend(query["sql"] for query in list(log)[start:])
+            setattr(connection, attribute, debug_cursor)
+            if not (debug_cursor or (debug_cursor is None and settings.DEBUG)):
+                # The queries wouldn't have been logged otherwise.
+                while len(log) > start:
+                    log.pop()
+
+
+def budget_exceeded(table, stats, budget):
+    return "%s exceeded its budget of %d queries: %s" % (type(table).__name__,
+                                                         budget, stats)
+
+
+def render_recorded(table, render):
+    """
+    Call *render*, which renders *table*, and return the result. If
+    ``settings.DEBUG`` is on or the table has a `.Table.Meta.query_budget`,
+    the queries it executes are recorded as `.Table.query_stats`. In debug
+    mode, a `.QueryBudgetWarning` is issued if there are more of them than
+    the budget.
+    """
+    budget = table._meta.query_budget
+    if not (settings.DEBUG or budget is not None):
+        return render()
+    with record_queries() as stats:
+        html = render()
+    table.query_stats = stats
+    if settings.DEBUG and budget is not None and len(stats) > budget:
+        warnings.warn(budget_exceeded(table, stats, budget),
+                      QueryBudgetWarning, stacklevel=3)
+    return html
+
+
+def assert_query_budget(table, budget=None):
+    """
+    Render *table* (using `.Table.as_html`) and raise `AssertionError` if
+    more queries than *budget* are executed. Meant to be used in tests, in
+    which ``settings.DEBUG`` is off.
+
+    :param budget: the maximum number of queries (default:
+                   `.Table.Meta.query_budget`)
+    :type  budget: `int`
+    :returns: the `.QueryStats` of the queries
+
+    .. code-block:: python
+
+        def test_people_table(self):
+            table = PeopleTable(Person.objects.all())
+            assert_query_budget(table, 2)
+    """
+    if budget is None:
+        budget = table._meta.query_budget
+        if budget is None:
+            raise ValueError("%s has no query budget" % type(table).__name__)
+    with record_queries() as stats:
+        table.as_html()
+    table.query_stats = stats
+    if len(stats) > budget:
+        raise AssertionError(budget_exceeded(table, stats, budget))
+    return stats
@@ -0,0 +1,352 @@
+# coding: utf-8
+from __future__ import absolute_import, unicode_literals
+from django.conf import settings
+from django.template import RequestContext, TemplateDoesNotExist
+from django.template.loader import find_template_loader, get_template
+from django.utils.encoding import force_unicode
+from django.utils.formats import localize
+from django.utils.html import escape
+from django.utils.http import urlencode
+from django.utils.safestring import EscapeData, mark_safe, SafeData
+from django.utils.translation import ugettext
+import os
+import re
+from .utils import build_request
+
+try:
+    from django.utils.timezone import template_localtime
+except ImportError:
+    try:
+        # Django 1.4
+        from django.utils.timezone import localtime as template_localtime
+    except ImportError:
+        # Django < 1.4
+        template_localtime = None
+
+
+DEFAULT_TEMPLATE = "django_tables2/table.html"
+COMPACT_TEMPLATE = "django_tables2/table_compact.html"
+TEMPLATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              "templates")
+
+# Templates shipped with django-tables2 whose output `NativeRenderer`
+# reproduces.
+NATIVE_TEMPLATES = (DEFAULT_TEMPLATE, COMPACT_TEMPLATE)
+
+# The default template is wrapped in ``{% spaceless %}`` and
+# ``{% nospaceless %}``, whitespace that's left between tags ends up as this.
+SPACE = "&#32;"
+RE_SPACE_BETWEEN_TAGS = re.compile(r">\s+<")
+WHITESPACE = " \t\n\r\f\v"
+
+
+def render_value(value, context):
+    """
+    Convert *value* to (escaped) unicode, the same way ``{{ value }}`` does in
+    a template rendered with *context*.
+    """
+    if template_localtime is not None:
+        value = template_localtime(value, use_tz=getattr(context, "use_tz", None))
+    value = localize(value, use_l10n=getattr(context, "use_l10n", None))
+    value = force_unicode(value)
+    if ((getattr(context, "autoescape", True) and not isinstance(value, SafeData))
+            or isinstance(value, EscapeData)):
+        return escape(value)
+    return value
+
+
+def template_loaders():
+    """
+    Yield the template loaders in ``TEMPLATE_LOADERS``, including the loaders
+    wrapped by the cached loader.
+    """
+    for name in settings.TEMPLATE_LOADERS:
+        loader = find_template_loader(name)
+        for loader in getattr(loader, "loaders", [loader]):
+            if loader is not None:
+                yield loader
+
+
+_native_template = {}
+
+
+def is_native_template(template):
+    """
+    Return `True` if *template* (a template name) is the default template
+    (or the compact template) shipped with django-tables2, i.e. it isn't a
+    different template, and it hasn't been overridden by a template of the
+    same name.
+    """
+    if template not in NATIVE_TEMPLATES:
+        return False
+    if template not in _native_template:
+        _native_template[template] = False
+        for loader in template_loaders():
+            try:
+                source, origin = loader.load_template_source(template)
+            except (TemplateDoesNotExist, AttributeError, NotImplementedError):
+                continue
+            _native_template[template] = (
+                    os.path.abspath(force_unicode(origin))
+                    == os.path.abspath(os.path.join(TEMPLATES_PATH, template)))
+            break
+    return _native_template[template]
+
+
+def nospaceless(html, content):
+    """
+    Apply ``{% nospaceless %}`` to *html*, which is the markup wrapped around
+    *content*.
+
+    The regular expression is only used when *content* could contain
+    whitespace between tags, otherwise *html* is returned untouched.
+    """
+    if "<" in content or ">" in content or (content and not content.strip(WHITESPACE)):
+        return RE_SPACE_BETWEEN_TAGS.sub(">%s<" % SPACE, html)
+    return html
+
+
+def querystring(request, key, value):
+    """
+    Equivalent of ``{% querystring key=value %}``.
+    """
+    if not request:
+        return ""
+    params = dict(request.GET)
+    if key not in ("", None):
+        params[key] = value
+    return escape("?" + urlencode(params, doseq=True))
+
+
+class NativeRenderer(object):
+    """
+    Renders a table to HTML in Python, producing the same output as the
+    default template (``django_tables2/table.html``) without the cost of
+    rendering a template.
+
+    :type    table: `.Table` object
+    :param   table: the table to render
+    :type  request: `~django.http.HttpRequest` object
+    :param request: the current request, used to build the querystrings of
+                    links
+
+    This is used by ``{% render_table %}`` and `.Table.as_html` for tables
+    that enable `.Table.Meta.native_rendering`.
+    """
+    def __init__(self, table, request=None):
+        self.table = table
+        self.request = request
+
+    def render(self, context=None):
+        """
+        Render the table.
+
+        :param context: the context the table is rendered in (default: a new
+                        `~django.template.RequestContext`)
+        :rtype: `~django.utils.safestring.SafeUnicode`
+        """
+        table = self.table
+        if context is None:
+            context = RequestContext(self.request or build_request(),
+                                     {"table": table})
+        parts = [self.render_head(context)]
+        render_row = self.render_row
+        empty = True
+        for index, row in enumerate(self.rows()):
+            empty = False
+            parts.append(render_row(row, index, context))
+        if empty:
+            parts.append(self.render_empty(context))
+        parts.append(self.render_tail(context))
+        return mark_safe("".join(parts))
+
+    def rows(self):
+        """
+        Return the rows to render, i.e. the rows on the current page, or all
+        of the rows if the table isn't paginated.
+        """
+        page = getattr(self.table, "page", None)
+        if page is not None and page.object_list:
+            return page.object_list
+        return self.table.rows
+
+    def render_head(self, context):
+        """
+        Render the start of the table, up to and including ``<tbody>``.
+        """
+        table = self.table
+        parts = []
+        if getattr(table, "page", None):
+            parts.append('<div class="table-container">')
+        attrs = table.attrs
+        if attrs:
+            html = attrs.as_html() if hasattr(attrs, "as_html") else ""
+            parts.append("<table %s>" % render_value(html, context))
+        else:
+            parts.append("<table>")
+        parts.append("<thead>%s<tr>%s" % (SPACE, SPACE))
+        field = table.prefixed_order_by_field
+        for column in table.columns:
+            header = render_value(column.header, context)
+            if column.orderable:
+                href = querystring(self.request, field, column.order_by_alias.next)
+                html = '<th %s><a href="%s">%s</a></th>' % (
+                    column.attrs["th"].as_html(), href, header)
+            else:
+                html = "<th %s>%s</th>" % (column.attrs["th"].as_html(), header)
+            parts.append(nospaceless(html, header) + SPACE)
+        parts.append("</tr>%s</thead>%s<tbody>%s" % (SPACE, SPACE, SPACE))
+        # Fragments used by render_row
+        self._td_open = ["<td %s>" % column.attrs["td"].as_html()
+                         for column in table.columns]
+        self._tr_open = ('<tr class="odd">' + SPACE, '<tr class="even">' + SPACE)
+        return "".join(parts)
+
+    def render_row(self, row, index, context):
+        """
+        Render a single ``<tr>`` (followed by the whitespace that separates
+        rows), preceded by the header of the group it starts, if any.
+        """
+        parts = []
+        if row.group is not None:
+            parts.append('<tr class="group" data-count="%d">' % row.group.count
+                         + SPACE)
+            for td_open, (column, cell) in zip(self._td_open, row.group.items()):
+                cell = render_value(cell, context)
+                parts.append(nospaceless(td_open + cell + "</td>", cell) + SPACE)
+            parts.append("</tr>" + SPACE)
+        parts.append(self._tr_open[index % 2])
+        for td_open, (column, cell) in zip(self._td_open, row.items()):
+            cell = render_value(cell, context)
+            parts.append(nospaceless(td_open + cell + "</td>", cell) + SPACE)
+        parts.append("</tr>" + SPACE)
+        return "".join(parts)
+
+    def render_empty(self, context):
+        """
+        Render the row that's shown when there are no rows.
+        """
+        table = self.table
+        if not table.empty_text:
+            return ""
+        text = render_value(table.empty_text, context)
+        html = '<tr><td colspan="%s">%s</td></tr>' % (len(table.columns), text)
+        return nospaceless(html, text) + SPACE
+
+    def render_tail(self, context):
+        """
+        Render the end of the table, including the footer and the
+        pagination.
+        """
+        parts = ["</tbody>%s<tfoot>" % SPACE]
+        table = self.table
+        if table.has_footer:
+            parts.append("<tr>")
+            for column in table.columns:
+                footer = render_value(column.footer, context)
+                html = "<td %s>%s</td>" % (column.attrs["td"].as_html(), footer)
+                parts.append(nospaceless(html, footer))
+            parts.append("</tr>")
+        parts.append("</tfoot></table>")
+        page = getattr(table, "page", None)
+        if page:
+            parts.append(self.render_pagination(page, context))
+            parts.append("</div>")
+        parts.append("\n")
+        return "".join(parts)
+
+    def render_pagination(self, page, context):
+        """
+        Render the pagination ``<ul>``.
+        """
+        table = self.table
+        field = table.prefixed_page_field
+        parts = ['<ul class="pagination">']
+        if page.has_previous():
+            parts.append('<li class="previous"><a href="%s">%s</a></li>' % (
+                querystring(self.request, field, page.previous_page_number()),
+                render_value(ugettext("Previous"), context)))
+        if page.has_previous() or page.has_next():
+            text = ugettext("Page %(current)s of %(total)s") % {
+                "current": render_value(page.number, context),
+                "total": render_value(table.paginator.num_pages, context)}
+            parts.append('<li class="current">%s</li>' % text)
+        if page.has_next():
+            parts.append('<li class="next"><a href="%s">%s</a></li>' % (
+                querystring(self.request, field, page.next_page_number()),
+                render_value(ugettext("Next"), context)))
+        total = page.paginator.count
+        count = len(page.object_list)
+        if total != count:
+            text = ugettext("%(count)s of %(total)s") % {
+                "count": render_value(count, context),
+                "total": render_value(total, context)}
+        else:
+            text = render_value(total, context)
+        name = (table.data.verbose_name if total == 1
+                else table.data.verbose_name_plural)
+        parts.append('<li class="cardinality">%s %s</li>'
+                     % (text, render_value(name, context)))
+        parts.append("</ul>")
+        return "".join(parts)
+
+
+class StreamingRenderer(NativeRenderer):
+    """
+    Renders a table to HTML, yielding the output in chunks rather than
+    building it as a single string.
+
+    :type       table: `.Table` object
+    :param      table: the table to render
+    :type     request: `~django.http.HttpRequest` object
+    :param    request: the current request, used to build the querystrings of
+                       links (a fresh request is used if not provided)
+    :type  chunk_size: `int`
+    :param chunk_size: number of rows rendered per chunk
+
+    The output is the same as the default template
+    (``django_tables2/table.html``). The first chunk contains everything up
+    to (and including) the ``<tbody>`` tag, each following chunk contains
+    *chunk_size* rows, and the last chunk closes the table and includes the
+    pagination.
+
+    Tables that use a different template (or if the default template has
+    been overridden) are rendered with their template, as a single chunk.
+
+    Iterating over the renderer does the rendering, e.g.:
+
+    .. code-block:: python
+
+        return StreamingHttpResponse(StreamingRenderer(table, request))
+    """
+    def __init__(self, table, request=None, chunk_size=500):
+        super(StreamingRenderer, self).__init__(table, request or build_request())
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        table = self.table
+        context = RequestContext(self.request, {"table": table})
+        # Give TemplateColumn the same context it would get via render_table.
+        table.context = context
+        try:
+            # Unless it's paginated, the table's rows are only iterated once.
+            with table.data.chunked(getattr(table, "page", None) is None):
+                if not is_native_template(table.template):
+                    yield get_template(table.template).render(context)
+                    return
+                rows = self.rows()
+                yield self.render_head(context)
+                empty = True
+                chunk = []
+                for index, row in enumerate(rows):
+                    empty = False
+                    chunk.append(self.render_row(row, index, context))
+                    if len(chunk) >= self.chunk_size:
+                        yield "".join(chunk)
+                        chunk = []
+                if empty:
+                    chunk.append(self.render_empty(context))
+                chunk.append(self.render_tail(context))
+                yield "".join(chunk)
+        finally:
+            del table.context
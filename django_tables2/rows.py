@@ -1,9 +1,19 @@
 # coding: utf-8
 from django.db import models
 from django.db.models.fields import FieldDoesNotExist
+import time
+from . import cache
 from .utils import A, getargspec
 
 
+#: Maximum number of records given to a single call of a column's loader
+#: (see :ref:`table.load_foo`). The rows of a page are loaded together.
+LOAD_BATCH_SIZE = 1000
+
+# The group of the row before the first one (see group_rows)
+NO_GROUP = object()
+
+
 class BoundRow(object):
     """
     Represents a *specific* row in a table.
@@ -67,6 +77,14 @@ class BoundRow(object):
     def __init__(self, record, table):
         self._record = record
         self._table = table
+        # Cells loaded from the row cache (see Table.Meta.row_cache_timeout)
+        self._cells = None
+        # Values of the columns that have a loader (see Table.load_FOO)
+        self._values = None
+        #: The `.BoundGroup` this row starts, if the table's rows are
+        #: grouped (see `.Table.Meta.group_by`) and it's the first row of
+        #: its group, otherwise `None`.
+        self.group = None
 
     @property
     def table(self):
@@ -99,27 +117,7 @@ class BoundRow(object):
         of a column.
         """
         bound_column = self.table.columns[name]
-
-        value = None
-        # We need to take special care here to allow get_FOO_display()
-        # methods on a model to be used if available. See issue #30.
-        path, _, remainder = bound_column.accessor.rpartition('.')
-        penultimate = A(path).resolve(self.record, quiet=True)
-        # If the penultimate is a model and the remainder is a field
-        # using choices, use get_FOO_display().
-        if isinstance(penultimate, models.Model):
-            try:
-                field = penultimate._meta.get_field(remainder)
-                display = getattr(penultimate, 'get_%s_display' % remainder, None)
-                if field.choices and display:
-                    value = display()
-                    remainder = None
-            except FieldDoesNotExist:
-                pass
-        # Fall back to just using the original accessor (we just need
-        # to follow the remainder).
-        if remainder:
-            value = A(remainder).resolve(penultimate, quiet=True)
+        value = self._get_value(bound_column)
 
         if value in bound_column.column.empty_values:
             return bound_column.default
@@ -145,6 +143,43 @@ class BoundRow(object):
 
         return bound_column.render(**expected)
 
+    def get_cell_value(self, name):
+        """
+        Returns the value for a cell in the row, given the name of a column,
+        *before* it's rendered (i.e. the *value* given to
+        :ref:`table.render_FOO`).
+        """
+        return self._get_value(self.table.columns[name])
+
+    def _get_value(self, bound_column):
+        if bound_column.load is not None:
+            if self._values is None or bound_column.name not in self._values:
+                # This row (or this column, which is hidden) wasn't loaded as
+                # part of a batch.
+                load_values([self], [bound_column])
+            return self._values.get(bound_column.name)
+        value = None
+        # We need to take special care here to allow get_FOO_display()
+        # methods on a model to be used if available. See issue #30.
+        path, _, remainder = bound_column.accessor.rpartition('.')
+        penultimate = A(path).resolve(self.record, quiet=True)
+        # If the penultimate is a model and the remainder is a field
+        # using choices, use get_FOO_display().
+        if isinstance(penultimate, models.Model):
+            try:
+                field = penultimate._meta.get_field(remainder)
+                display = getattr(penultimate, 'get_%s_display' % remainder, None)
+                if field.choices and display:
+                    value = display()
+                    remainder = None
+            except FieldDoesNotExist:
+                pass
+        # Fall back to just using the original accessor (we just need
+        # to follow the remainder).
+        if remainder:
+            value = A(remainder).resolve(penultimate, quiet=True)
+        return value
+
     def __contains__(self, item):
         """Check by both row object and column name."""
         if isinstance(item, basestring):
@@ -157,28 +192,127 @@ class BoundRow(object):
         Returns iterator yielding ``(bound_column, cell)`` pairs.
 
         *cell* is ``row[name]`` -- the rendered unicode value that should be
-        ``rendered within ``<td>``.
+        ``rendered within ``<td>``. If the row was loaded from the row cache,
+        *cell* is the cached HTML instead.
         """
+        if self._cells is not None:
+            for column, cell in zip(self.table.columns, self._cells):
+                yield (column, cell)
+            return
         for column in self.table.columns:
             yield (column, self[column.name])
 
 
+class BoundGroup(object):
+    """
+    The header of a group of rows (see `.Table.Meta.group_by`), which is
+    rendered before the first row of the group.
+
+    :param       row: the first `.BoundRow` of the group
+    :param     count: the number of rows in the group
+    :param subtotals: the values of the group's footer aggregates (see
+                      `.Column.footer`), keyed by column name
+    """
+    def __init__(self, row, count, subtotals):
+        self.row = row
+        self.count = count
+        self.subtotals = subtotals
+
+    @property
+    def value(self):
+        """The rendered value of the group column shared by the group's rows."""
+        return self.row[self.row.table._meta.group_by]
+
+    def __iter__(self):
+        """Iterate over the cells of the group's header."""
+        for column, cell in self.items():
+            yield cell
+
+    def items(self):
+        """
+        Returns iterator yielding ``(bound_column, cell)`` pairs, where *cell*
+        is the group's value for the group column, the group's subtotal for
+        the columns that have a footer, and an empty string otherwise.
+        """
+        group_by = self.row.table._meta.group_by
+        for column in self.row.table.columns:
+            if column.name == group_by:
+                yield (column, self.value)
+            else:
+                subtotal = self.subtotals.get(column.name)
+                yield (column, "" if subtotal is None else subtotal)
+
+
 class BoundRows(object):
     """
     Container for spawning `.BoundRow` objects.
 
-    :param  data: iterable of records
-    :param table: the table in which the rows exist
+    :param    data: iterable of records
+    :param   table: the table in which the rows exist
+    :param memoize: keep the rows once they've been prepared (see
+                    `prepare`), so iterating over them again doesn't prepare
+                    them again. Used for slices (e.g. the rows of a page,
+                    which a template iterates over several times).
 
     This is used for `.Table.rows`.
     """
-    def __init__(self, data, table):
+    def __init__(self, data, table, memoize=False):
         self.data = data
         self.table = table
+        self.memoize = memoize
+        self._rows = None
 
     def __iter__(self):
-        for record in self.data:
-            yield BoundRow(record, table=self.table)
+        if self._rows is None and self.memoize:
+            self._rows = list(self.iterate())
+        if self._rows is not None:
+            return iter(self._rows)
+        return self.iterate()
+
+    def iterate(self):
+        """
+        Yield a `.BoundRow` for each record, prepared in batches.
+        """
+        table = self.table
+        loading = any(column.load is not None for column in table.columns)
+        caching = cache.row_cache_enabled(table)
+        grouping = table._meta.group_by is not None
+        records = timed_records(self.data, table.timings)
+        if not (loading or caching or grouping):
+            for record in records:
+                yield BoundRow(record, table=table)
+            return
+        size = LOAD_BATCH_SIZE if loading or grouping else cache.ROW_BATCH_SIZE
+        batch = []
+        previous = NO_GROUP
+        for record in records:
+            batch.append(BoundRow(record, table=table))
+            if len(batch) >= size:
+                previous = self.prepare(batch, loading, caching, grouping,
+                                        previous)
+                for row in batch:
+                    yield row
+                batch = []
+        self.prepare(batch, loading, caching, grouping, previous)
+        for row in batch:
+            yield row
+
+    def prepare(self, rows, loading, caching, grouping=False, previous=NO_GROUP):
+        """
+        Load the values of a batch of rows' columns that have a loader, their
+        cached cells, and the groups they start, before the rows are used.
+
+        :returns: key of the group of the last row (see `group_rows`)
+        """
+        started = time.time()
+        if rows and loading:
+            load_values(rows)
+        if caching:
+            cache.cache_rows(rows)
+        if rows and grouping:
+            previous = group_rows(rows, previous)
+        self.table.timings.add("fetch", time.time() - started)
+        return previous
 
     def __len__(self):
         return len(self.data)
@@ -188,5 +322,111 @@ class BoundRows(object):
         Slicing returns a new `.BoundRows` instance, indexing returns a single
         `.BoundRow` instance.
         """
-        container = BoundRows if isinstance(key, slice) else BoundRow
-        return container(self.data[key], table=self.table)
+        if isinstance(key, slice):
+            return BoundRows(self.data[key], table=self.table, memoize=True)
+        return BoundRow(self.data[key], table=self.table)
+
+
+def timed_records(data, timings):
+    """
+    Return an iterator over the records of *data* that adds the time spent
+    getting them (e.g. fetching them from the database) to the ``fetch``
+    phase of *timings* when the iteration ends. Records that are already in
+    a list aren't timed.
+    """
+    if isinstance(data, list) or hasattr(data, "list"):
+        # list data (or a slice of it)
+        return iter(data)
+    return _timed_records(data, timings)
+
+
+def _timed_records(data, timings):
+    spent = 0.0
+    records = iter(data)
+    try:
+        while True:
+            started = time.time()
+            try:
+                record = next(records)
+            except StopIteration:
+                spent += time.time() - started
+                return
+            spent += time.time() - started
+            yield record
+    finally:
+        timings.add("fetch", spent)
+
+
+def load_values(rows, columns=None):
+    """
+    Call the loader of each of the table's columns that has one (see
+    :ref:`table.load_foo`) with the records of *rows*, and store the values
+    on the rows.
+
+    :param columns: the `.BoundColumn` objects to load (default: the visible
+                    columns that have a loader)
+
+    Loaders return a `dict` that maps the primary key of each record to its
+    value. Records that are missing get `None` (i.e. the column's default).
+    Records without a primary key (e.g. a `dict` without a ``pk`` key) raise
+    `ValueError`, since their values can't be told apart.
+
+    The loaders of `.ConcurrentColumn` columns are started first, and run in
+    the background while the other loaders are called.
+    """
+    table = rows[0].table
+    if columns is None:
+        columns = [column for column in table.columns if column.load is not None]
+    records = [row.record for row in rows]
+    pk = A("pk")
+    keys = [pk.resolve(record, quiet=True) for record in records]
+    if None in keys and columns:
+        raise ValueError("%s.%s is loaded by primary key, but a record doesn't "
+                         "have one: %r" % (type(table).__name__, columns[0].name,
+                                           records[keys.index(None)]))
+    for row in rows:
+        if row._values is None:
+            row._values = {}
+
+    def store(name, values):
+        for key, row in zip(keys, rows):
+            row._values[name] = values.get(key)
+
+    pending = []
+    for column in columns:
+        if hasattr(column.column, "start_loading"):
+            name = "%s.%s" % (type(table).__name__, column.name)
+            pending.append((column, column.column.start_loading(column.load,
+                                                                records, name)))
+        else:
+            store(column.name, column.load(records) or {})
+    for column, values in pending:
+        values = values()
+        if values is None:
+            # The loader failed or timed out.
+            fallback = column.column.fallback
+            values = dict.fromkeys(keys, fallback)
+        store(column.name, values)
+
+
+def group_rows(rows, previous=NO_GROUP):
+    """
+    Attach a `.BoundGroup` to each of *rows* that starts a group (see
+    `.Table.Meta.group_by`). The counts and subtotals of the groups are
+    fetched together.
+
+    :param previous: key of the group of the row before *rows*
+    :returns: key of the group of the last row
+    """
+    data = rows[0].table.data
+    keys = [data.group_key(row.record) for row in rows]
+    starts = []
+    for key, row in zip(keys, rows):
+        if key != previous:
+            starts.append((key, row))
+        previous = key
+    groups = data.groups(set(key for key, row in starts))
+    for key, row in starts:
+        count, subtotals = groups.get(key, (0, {}))
+        row.group = BoundGroup(row, count, subtotals)
+    return previous
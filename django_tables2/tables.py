@@ -1,20 +1,32 @@
 # coding: utf-8
+from contextlib import contextmanager
 import copy
 from django.core.paginator       import Paginator
+from django.db.models            import Avg, Count, Max, Min, Model, Q, Sum
 from django.db.models.fields     import FieldDoesNotExist
 from django.utils.datastructures import SortedDict
 from django.template             import RequestContext
 from django.template.loader      import get_template
 from django.utils.encoding       import StrAndUnicode
+import time
 import warnings
 from .utils import (Accessor, AttributeDict, cached_property, build_request,
-                    OrderBy, OrderByTuple, segment, Sequence)
+                    has_aggregates, OrderBy, OrderByTuple, segment, Sequence)
+from .renderers import is_native_template, NativeRenderer
 from .rows  import BoundRows
+from .cache import accessor_models, connect_signals, render_cached
+from .queries import render_recorded
+from .timings import Timings
+from .export import CSVExport, JSONExport, NDJSONExport, XLSXExport
 from .      import columns
 
 
 QUERYSET_ACCESSOR_SEPARATOR = '__'
 
+# Aggregates that can be used as a column's footer.
+FOOTER_AGGREGATES = {"avg": Avg, "count": Count, "max": Max, "min": Min,
+                     "sum": Sum}
+
 
 class TableData(object):
     """
@@ -26,6 +38,15 @@ class TableData(object):
     """
     def __init__(self, data, table):
         self.table = table
+        # Ordering that's applied in Python to a queryset's records (see
+        # Table.Meta.python_ordering_limit), and the sorted records.
+        self._python_ordering = None
+        self._sorted = None
+        self._footer = None
+        # Whether an unevaluated queryset is iterated in chunks (see chunked)
+        self._chunked = False
+        # (count, subtotals) of the groups fetched so far, keyed by group
+        self._groups = {}
         # data may be a QuerySet-like objects with count() and order_by()
         if (hasattr(data, 'count') and callable(data.count) and
             hasattr(data, 'order_by') and callable(data.order_by)):
@@ -38,19 +59,92 @@ class TableData(object):
                 raise ValueError('data must be QuerySet-like (have count and '
                                  'order_by) or support list(data) -- %s has '
                                  'neither' % type(data).__name__)
+            # Records that are equal when ordered keep their original order,
+            # rather than the order of a previous ordering.
+            self._original = self.list[:]
 
     def __len__(self):
+        if hasattr(self, "_length"):
+            return self._length
+        started = time.time()
+        if hasattr(self, "queryset") and self.footer_aggregates():
+            # Loading the footer fetches the count (and sets _length) along
+            # with the footer's aggregates, in the same query.
+            self.load_footer()
         if not hasattr(self, "_length"):
             # Use the queryset count() method to get the length, instead of
             # loading all results into memory. This allows, for example,
             # smart paginators that use len() to perform better.
             self._length = (self.queryset.count() if hasattr(self, 'queryset')
                                                   else len(self.list))
+        self.table.timings.add("count", time.time() - started)
         return self._length
 
+    def footer_aggregates(self):
+        """
+        Return a `dict` of the aggregates of the columns that have a footer
+        (see `.Column.footer`), keyed by column name.
+        """
+        aggregates = {}
+        for bound_column in self.table.columns.iterall():
+            footer = bound_column.column.footer
+            if footer is None:
+                continue
+            if isinstance(footer, basestring):
+                lookup = bound_column.accessor.replace(Accessor.SEPARATOR,
+                                                       QUERYSET_ACCESSOR_SEPARATOR)
+                footer = FOOTER_AGGREGATES[footer](lookup)
+            aggregates[bound_column.name] = footer
+        return aggregates
+
+    @property
+    def footer(self):
+        """
+        The values of the footer aggregates (a `dict` keyed by column name),
+        see `.load_footer`.
+        """
+        return self.load_footer()
+
+    def load_footer(self):
+        """
+        Compute the values of the footer aggregates, unless they already
+        have been, and return them.
+
+        A queryset's aggregates (and its count, unless it's already known)
+        are fetched with a single ``aggregate()`` query. The aggregates of
+        other data are computed in a single pass over the records.
+        """
+        if self._footer is not None:
+            return self._footer
+        aggregates = self.footer_aggregates()
+        if not aggregates:
+            self._footer = {}
+        elif hasattr(self, "queryset"):
+            kwargs = dict(("footer_%s" % name, aggregate)
+                          for name, aggregate in aggregates.items())
+            if not hasattr(self, "_length"):
+                # "pk" isn't resolved in the subquery used for querysets with
+                # aggregate annotations (on Django < 1.8).
+                kwargs["count"] = Count(self.queryset.model._meta.pk.name)
+            values = self.queryset.order_by().aggregate(**kwargs)
+            if values.get("count") is not None:
+                # (An empty queryset, e.g. none(), doesn't count its rows.)
+                self._length = values["count"]
+            self._footer = dict((name, values["footer_%s" % name])
+                                for name in aggregates)
+        else:
+            self._footer = aggregate_records(self.list, aggregates)
+        return self._footer
+
     @property
     def data(self):
-        return self.queryset if hasattr(self, "queryset") else self.list
+        if not hasattr(self, "queryset"):
+            return self.list
+        if self._python_ordering is not None:
+            if self._sorted is None:
+                self._sorted = sorted(self.queryset, cmp=self._python_ordering.cmp)
+            return self._sorted
+        return self.queryset
 
     @property
     def ordering(self):
@@ -73,6 +167,18 @@ class TableData(object):
             except StopIteration:
                 pass
 
+    def annotate(self):
+        """
+        Add the values of the table's `.ExpressionColumn` columns to the
+        queryset (list data is left as is).
+        """
+        if not hasattr(self, "queryset"):
+            return
+        for bound_column in self.table.columns.iterall():
+            if hasattr(bound_column.column, "annotate"):
+                self.queryset = bound_column.column.annotate(self.queryset,
+                                                             bound_column.name)
+
     def order_by(self, aliases):
         """
         Order the data based on order by aliases (prefixed column names) in the
@@ -82,31 +188,240 @@ class TableData(object):
                         descending order) in order of significance with
                         regard to data ordering.
         :type  aliases: `~.utils.OrderByTuple`
+        :returns: the aliases the data was ordered by, i.e. *aliases* without
+                  those that couldn't be applied (see
+                  `.Table.Meta.python_ordering_limit`)
         """
-        accessors = []
+        started = time.time()
+        # (alias, accessor) pairs
+        pairs = []
         for alias in aliases:
             bound_column = self.table.columns[OrderBy(alias).bare]
             # bound_column.order_by reflects the current ordering applied to
             # the table. As such we need to check the current ordering on the
             # column and use the opposite if it doesn't match the alias prefix.
             if alias[0] != bound_column.order_by_alias[0]:
-                accessors += bound_column.order_by.opposite
+                pairs += [(alias, a) for a in bound_column.order_by.opposite]
             else:
-                accessors += bound_column.order_by
+                pairs += [(alias, a) for a in bound_column.order_by]
+        group_by = self.table._meta.group_by
+        if group_by is not None:
+            # The rows of a group have to be next to each other.
+            accessor = unicode(self.table.columns[group_by].accessor)
+            grouped = [p for p in pairs if OrderBy(p[1]).bare == accessor]
+            pairs = (grouped[:1] or [(None, OrderBy(accessor))]) + [
+                p for p in pairs if OrderBy(p[1]).bare != accessor]
+        accessors = [accessor for alias, accessor in pairs]
+        applied = aliases
         if hasattr(self, "queryset"):
+            # The database orders by the accessors up to the first one it
+            # can't order by (e.g. a property), the rest is done in Python.
+            split = len(accessors)
+            for index, accessor in enumerate(accessors):
+                if not self.orderable_in_db(OrderBy(accessor).bare):
+                    split = index
+                    break
             translate = lambda accessor: accessor.replace(Accessor.SEPARATOR, QUERYSET_ACCESSOR_SEPARATOR)
-            self.queryset = self.queryset.order_by(*(translate(a) for a in accessors))
+            ordering = [translate(a) for a in accessors[:split]]
+            if (accessors and self.pk_orderable()
+                    and not self.unique_ordering(ordering)):
+                # Rows that are equal otherwise have to be in the same order
+                # on every page.
+                descending = bool(ordering) and OrderBy(ordering[-1]).is_descending
+                ordering.append("-pk" if descending else "pk")
+            self.queryset = self.queryset.order_by(*ordering)
+            self._python_ordering = None
+            self._sorted = None
+            limit = self.table._meta.python_ordering_limit
+            if split < len(accessors) and (limit is None or len(self) <= limit):
+                untranslate = lambda accessor: accessor.replace(QUERYSET_ACCESSOR_SEPARATOR, Accessor.SEPARATOR)
+                self._python_ordering = OrderByTuple(untranslate(a) for a in accessors)
+            elif split < len(accessors):
+                # Only the leading accessors are applied, so the data isn't
+                # ordered by the columns of the others.
+                dropped = set(alias for alias, accessor in pairs[split:])
+                applied = OrderByTuple(a for a in aliases if a not in dropped)
         else:
-            self.list.sort(cmp=OrderByTuple(accessors).cmp)
+            self.list = sorted(self._original, cmp=OrderByTuple(accessors).cmp)
+        self.table.timings.add("sort", time.time() - started)
+        return applied
+
+    def group_key(self, record):
+        """
+        Return the key of the group *record* belongs to (see
+        `.Table.Meta.group_by`), i.e. its value of the group column's
+        accessor (the primary key if it's a model instance).
+        """
+        bound_column = self.table.columns[self.table._meta.group_by]
+        value = bound_column.accessor.resolve(record, quiet=True)
+        return value.pk if isinstance(value, Model) else value
+
+    def groups(self, keys):
+        """
+        Return the number of rows and the subtotals (the footer aggregates,
+        see `.Column.footer`) of the groups with the given *keys*, as a
+        `dict` of ``(count, subtotals)`` tuples keyed by group.
+
+        The groups of a queryset that haven't been fetched yet are fetched
+        with a single ``values(...).annotate(...)`` query.
+        """
+        missing = [key for key in keys if key not in self._groups]
+        if missing:
+            self._groups.update(self.aggregate_groups(missing))
+        return dict((key, self._groups[key]) for key in keys if key in self._groups)
+
+    def aggregate_groups(self, keys):
+        aggregates = self.footer_aggregates()
+        if not hasattr(self, "queryset"):
+            records = {}
+            for record in self.list:
+                key = self.group_key(record)
+                if key in keys:
+                    records.setdefault(key, []).append(record)
+            return dict((key, (len(group), aggregate_records(group, aggregates)))
+                        for key, group in records.items())
+        bound_column = self.table.columns[self.table._meta.group_by]
+        lookup = bound_column.accessor.replace(Accessor.SEPARATOR,
+                                               QUERYSET_ACCESSOR_SEPARATOR)
+        condition = Q(**{lookup + "__in": [key for key in keys if key is not None]})
+        if None in keys:
+            condition |= Q(**{lookup + "__isnull": True})
+        kwargs = dict(("footer_%s" % name, aggregate)
+                      for name, aggregate in aggregates.items())
+        kwargs["count"] = Count(self.queryset.model._meta.pk.name)
+        values = (self.queryset.filter(condition).order_by()
+                  .values(lookup).annotate(**kwargs))
+        return dict((group[lookup], (group["count"],
+                                     dict((name, group["footer_%s" % name])
+                                          for name in aggregates)))
+                    for group in values)
+
+    def pk_orderable(self):
+        """
+        Return `True` if ordering the queryset by the primary key as well
+        doesn't change which rows it returns. It does for querysets of
+        `~django.db.models.query.QuerySet.values` (e.g. grouped using
+        ``values(...).annotate(...)``), querysets of distinct rows, and
+        querysets with aggregates or a ``GROUP BY``, whose rows would be
+        split by primary key.
+        """
+        queryset = self.queryset
+        if getattr(queryset, "_fields", None) is not None:
+            return False
+        query = queryset.query
+        if query.distinct or query.group_by is not None:
+            return False
+        return not has_aggregates(query)
+
+    def unique_ordering(self, ordering):
+        """
+        Return `True` if no two records of the queryset are equal when
+        ordered by *ordering* (a list of lookups), i.e. it includes the
+        primary key or another unique field of the model that can't be
+        `None`.
+        """
+        meta = self.queryset.model._meta
+        for lookup in ordering:
+            bare = OrderBy(lookup).bare
+            if bare in ("pk", meta.pk.name, meta.pk.attname):
+                return True
+            try:
+                field = meta.get_field(bare)
+            except FieldDoesNotExist:
+                continue
+            if field.unique and not field.null:
+                return True
+        return False
+
+    def orderable_in_db(self, accessor):
+        """
+        Return `True` if the queryset can be ordered by *accessor* in the
+        database, i.e. it's a path of model fields (following relations), or
+        the name of a value selected by the queryset (e.g. an annotation).
+        """
+        query = self.queryset.query
+        annotations = getattr(query, "annotations", None)
+        if annotations is None:
+            # Django < 1.8
+            annotations = query.aggregates
+        bits = accessor.replace(QUERYSET_ACCESSOR_SEPARATOR, Accessor.SEPARATOR).split(Accessor.SEPARATOR)
+        if len(bits) == 1 and (bits[0] in query.extra or bits[0] in annotations):
+            return True
+        model = self.queryset.model
+        for index, bit in enumerate(bits):
+            last = index == len(bits) - 1
+            if bit == "pk":
+                return last
+            try:
+                field = model._meta.get_field_by_name(bit)[0]
+            except FieldDoesNotExist:
+                return False
+            if last:
+                return True
+            rel = getattr(field, "rel", None)
+            if rel is not None and getattr(rel, "to", None) is not None:
+                model = rel.to
+            elif hasattr(field, "field") and hasattr(field, "model"):
+                # reverse relation (RelatedObject)
+                model = field.model
+            else:
+                return False
 
     def __iter__(self):
         """
         for ... in ... default to using this. There's a bug in Django 1.3
         with indexing into querysets, so this side-steps that problem (as well
         as just being a better way to iterate).
+
+        Within `.chunked`, a queryset that hasn't been evaluated is iterated
+        using `.iterator`, so that its records aren't kept in memory. That
+        isn't possible for a queryset with ``prefetch_related()`` lookups,
+        which `~django.db.models.query.QuerySet.iterator` ignores.
         """
+        chunk_size = self.table._meta.iterator_chunk_size
+        if (self._chunked and chunk_size and hasattr(self, "queryset")
+                and self._python_ordering is None
+                and not getattr(self.queryset, "_prefetch_related_lookups", None)
+                and getattr(self.queryset, "_result_cache", ()) is None):
+            return self.iterator(chunk_size)
         return iter(self.data)
 
+    @contextmanager
+    def chunked(self, enabled=True):
+        """
+        Iterate over a queryset that hasn't been evaluated in chunks of
+        `.Table.Meta.iterator_chunk_size` within the block (if *enabled*),
+        rather than caching its records.
+
+        Used while all of the table's rows are rendered or exported, which
+        only iterates over them once. Iterating over them again runs the
+        query again.
+        """
+        chunked = self._chunked
+        self._chunked = self._chunked or enabled
+        try:
+            yield
+        finally:
+            self._chunked = chunked
+
+    def iterator(self, chunk_size):
+        """
+        Iterate over the queryset without populating its result cache.
+
+        :param chunk_size: how many records to fetch from the database at a
+                           time
+        :type  chunk_size: `int`
+
+        Where Django supports it, *chunk_size* is passed to
+        `~django.db.models.query.QuerySet.iterator` (which also allows
+        server-side cursors to be used). Older versions fetch records in
+        chunks of ``GET_ITERATOR_CHUNK_SIZE``.
+        """
+        try:
+            return self.queryset.iterator(chunk_size=chunk_size)
+        except TypeError:
+            return self.queryset.iterator()
+
     def __getitem__(self, key):
         """
         Slicing returns a new `.TableData` instance, indexing returns a
@@ -139,6 +454,43 @@ class TableData(object):
         return getattr(self.list, "verbose_name_plural", "items")
 
 
+def aggregate_records(records, aggregates):
+    """
+    Compute *aggregates* (a `dict` of `~django.db.models.Aggregate` objects)
+    over a list of records in a single pass, the same way the database
+    would, i.e. ignoring `None` values.
+    """
+    columns = [(name, Accessor(aggregate.lookup.replace(
+                    QUERYSET_ACCESSOR_SEPARATOR, Accessor.SEPARATOR)),
+                aggregate.name.lower())
+               for name, aggregate in aggregates.items()]
+    # [count, total, minimum, maximum] of each column
+    state = dict((name, [0, None, None, None]) for name, _, _ in columns)
+    for record in records:
+        for name, accessor, kind in columns:
+            value = accessor.resolve(record, quiet=True)
+            if value is None:
+                continue
+            current = state[name]
+            current[0] += 1
+            if kind in ("sum", "avg"):
+                current[1] = value if current[1] is None else current[1] + value
+            elif kind == "min":
+                current[2] = value if current[2] is None else min(current[2], value)
+            elif kind == "max":
+                current[3] = value if current[3] is None else max(current[3], value)
+    values = {}
+    for name, accessor, kind in columns:
+        count, total, minimum, maximum = state[name]
+        if kind == "count":
+            values[name] = count
+        elif kind == "avg":
+            values[name] = float(total) / count if count else None
+        else:
+            values[name] = {"sum": total, "min": minimum, "max": maximum}.get(kind)
+    return values
+
+
 class DeclarativeColumnsMetaclass(type):
     """
     Metaclass that converts `.Column` objects defined on a class to the
@@ -169,13 +521,13 @@ class DeclarativeColumnsMetaclass(type):
             if opts.fields:
                 # Each item in opts.fields is the name of a model field or a
                 # normal attribute on the model
-                for name in opts.fields:
+                for field_name in opts.fields:
                     try:
-                        field = opts.model._meta.get_field(name)
+                        field = opts.model._meta.get_field(field_name)
                     except FieldDoesNotExist:
-                        extra[name] = columns.Column()
+                        extra[field_name] = columns.Column()
                     else:
-                        extra[name] = columns.library.column_for_field(field)
+                        extra[field_name] = columns.library.column_for_field(field)
             else:
                 for field in opts.model._meta.fields:
                     extra[field.name] = columns.library.column_for_field(field)
@@ -193,6 +545,11 @@ class DeclarativeColumnsMetaclass(type):
             # Table's sequence defaults to sequence declared in Meta
             #attrs['_sequence'] = opts.sequence
             attrs["base_columns"] = SortedDict(((x, attrs["base_columns"][x]) for x in opts.sequence))
+        if opts.cache_timeout is not None and opts.model is not None:
+            accessors = [column.accessor or Accessor(name)
+                         for name, column in attrs["base_columns"].items()]
+            connect_signals(accessor_models(opts.model, accessors),
+                            opts.cache_alias)
         return super(DeclarativeColumnsMetaclass, mcs).__new__(mcs, name, bases, attrs)
 
 
@@ -222,6 +579,10 @@ class TableOptions(object):
         self.per_page = getattr(options, "per_page", 25)
         self.per_page_field = getattr(options, "per_page_field", "per_page")
         self.prefix = getattr(options, "prefix", "")
+        self.iterator_chunk_size = getattr(options, "iterator_chunk_size", 2000)
+        self.python_ordering_limit = getattr(options, "python_ordering_limit", 1000)
+        self.group_by = getattr(options, "group_by", None)
+        self.query_budget = getattr(options, "query_budget", None)
         self.sequence = Sequence(getattr(options, "sequence", ()))
         if hasattr(options, "sortable"):
             warnings.warn("`Table.Meta.sortable` is deprecated, use `orderable` instead",
@@ -229,6 +590,16 @@ class TableOptions(object):
         self.orderable = self.sortable = getattr(options, "orderable", getattr(options, "sortable", True))
         self.model = getattr(options, "model", None)
         self.template = getattr(options, "template", "django_tables2/table.html")
+        self.cache_timeout = getattr(options, "cache_timeout", None)
+        self.cache_stale_timeout = getattr(options, "cache_stale_timeout", 0)
+        self.cache_alias = getattr(options, "cache_alias", "default")
+        cache_vary_on = getattr(options, "cache_vary_on", ())
+        if isinstance(cache_vary_on, basestring):
+            cache_vary_on = (cache_vary_on, )
+        self.cache_vary_on = tuple(cache_vary_on)
+        self.row_cache_timeout = getattr(options, "row_cache_timeout", None)
+        self.row_cache_version = getattr(options, "row_cache_version", None)
+        self.native_rendering = getattr(options, "native_rendering", False)
 
 
 class Table(StrAndUnicode):
@@ -320,6 +691,14 @@ class Table(StrAndUnicode):
         :type: `unicode`
 
 
+    .. attribute:: query_stats
+
+        The queries executed when the table was last rendered, if they were
+        recorded (see `.Table.Meta.query_budget`), otherwise `None`.
+
+        :type: `.QueryStats`
+
+
     .. attribute:: rows
 
         The rows of the table (ignoring pagination).
@@ -352,6 +731,14 @@ class Table(StrAndUnicode):
 
         :type: `unicode`
 
+
+    .. attribute:: timings
+
+        The seconds spent counting, sorting, paginating, fetching and
+        rendering the table (see :ref:`server-timing`).
+
+        :type: `.Timings`
+
     """
     __metaclass__ = DeclarativeColumnsMetaclass
     TableDataClass = TableData
@@ -361,6 +748,8 @@ class Table(StrAndUnicode):
                  order_by_field=None, page_field=None, per_page_field=None,
                  template=None, sortable=None, default=None):
         super(Table, self).__init__()
+        self.query_stats = None
+        self.timings = Timings()
         self.exclude = exclude or ()
         self.sequence = sequence
         self.data = self.TableDataClass(data=data, table=self)
@@ -398,6 +787,7 @@ class Table(StrAndUnicode):
             self._sequence = Sequence(self._meta.fields + ('...',))
             self._sequence.expand(self.base_columns.keys())
         self.columns = columns.BoundColumns(self)
+        self.data.annotate()
         # `None` value for order_by means no order is specified. This means we
         # `shouldn't touch our data's ordering in any way. *However*
         # `table.order_by = None` means "remove any ordering from the data"
@@ -413,11 +803,22 @@ class Table(StrAndUnicode):
                 self.order_by = order_by
         else:
             self.order_by = order_by
+        if self._meta.group_by is not None and self._order_by is None:
+            # Order by the group column.
+            self.data.order_by(())
         self.template = template
 
     def __unicode__(self):
         return unicode(repr(self))
 
+    @property
+    def has_footer(self):
+        """
+        `True` if any of the table's visible columns has a footer aggregate
+        (see `.Column.footer`).
+        """
+        return any(column.column.footer is not None for column in self.columns)
+
     def as_html(self):
         """
         Render the table to a simple HTML table.
@@ -426,9 +827,77 @@ class Table(StrAndUnicode):
         generated will clobber the querystring of the request. Use the
         ``{% render_table %}`` template tag instead.
         """
-        template = get_template(self.template)
         request = build_request()
-        return template.render(RequestContext(request, {'table': self}))
+        context = RequestContext(request, {'table': self})
+        if self._meta.native_rendering and is_native_template(self.template):
+            render = lambda: NativeRenderer(self, request).render(context)
+        else:
+            template = get_template(self.template)
+            render = lambda: template.render(context)
+        # As with {% render_table %}, TemplateColumn uses the context.
+        self.context = context
+        started = time.time()
+        try:
+            # Unless it's paginated, the table's rows are only iterated once.
+            with self.data.chunked(getattr(self, "page", None) is None):
+                return render_cached(self, lambda: render_recorded(self, render),
+                                     request, self.template)
+        finally:
+            del self.context
+            self.timings.add("render", time.time() - started)
+
+    def as_csv(self, raw=False):
+        """
+        Export the table's rows as CSV.
+
+        :type  raw: `bool`
+        :param raw: export the values from the data rather than the rendered
+                    values (i.e. skip :ref:`table.render_FOO` methods)
+        :returns: iterator yielding a line at a time (see `.CSVExport`)
+
+        Only visible columns are exported. Pagination is ignored, all of the
+        table's rows are exported.
+        """
+        return CSVExport(self, raw=raw)
+
+    def as_json(self, raw=False):
+        """
+        Export the current page of the table as JSON.
+
+        :type  raw: `bool`
+        :param raw: export the values from the data rather than the rendered
+                    values
+
+        Returns an iterator yielding the JSON (see `.JSONExport` for the
+        structure). If the table isn't paginated, all rows are included.
+        """
+        return JSONExport(self, raw=raw)
+
+    def as_ndjson(self, raw=False):
+        """
+        Export the table's rows as newline delimited JSON.
+
+        :type  raw: `bool`
+        :param raw: export the values from the data rather than the rendered
+                    values
+        :returns: iterator yielding a line (JSON object) per row
+
+        Pagination is ignored, all of the table's rows are exported.
+        """
+        return NDJSONExport(self, raw=raw)
+
+    def as_xlsx(self, raw=True):
+        """
+        Export the table as an Excel workbook.
+
+        :type  raw: `bool`
+        :param raw: export the values from the data rather than the rendered
+                    values (which are often text, e.g. for dates)
+        :returns: iterator yielding the workbook in chunks (of bytes)
+
+        Pagination is ignored, all of the table's rows are exported.
+        """
+        return XLSXExport(self, raw=raw)
 
     @property
     def attrs(self):
@@ -469,7 +938,7 @@ class Table(StrAndUnicode):
             if name in self.columns and self.columns[name].orderable:
                 valid.append(alias)
         self._order_by = OrderByTuple(valid)
-        self.data.order_by(self._order_by)
+        self._order_by = self.data.order_by(self._order_by)
 
     @property
     def order_by_field(self):
@@ -507,9 +976,13 @@ class Table(StrAndUnicode):
         `~django.core.paginator.PageNotAnInteger`) may be raised from this
         method and should be handled by the caller.
         """
+        started = time.time()
         per_page = per_page or self._meta.per_page
-        self.paginator = klass(self.rows, per_page, *args, **kwargs)
-        self.page = self.paginator.page(page)
+        try:
+            self.paginator = klass(self.rows, per_page, *args, **kwargs)
+            self.page = self.paginator.page(page)
+        finally:
+            self.timings.add("paginate", time.time() - started)
 
     @property
     def per_page_field(self):
@@ -1,17 +1,25 @@
 # coding: utf-8
 from __future__ import absolute_import
 from django import template
-from django.template import TemplateSyntaxError, Variable, Node
+from django.template import TemplateSyntaxError, TextNode, Variable, Node
 from django.template.loader import get_template, select_template
 from django.template.defaultfilters import stringfilter, title as old_title
 from django.utils.datastructures import SortedDict
+from django.utils.encoding import force_unicode
 from django.utils.http import urlencode
 from django.utils.html import escape
 from django.utils.safestring import mark_safe
 import django_tables2 as tables
+from django_tables2.cache import render_cached
 from django_tables2.config import RequestConfig
+from django_tables2.queries import render_recorded
+from django_tables2.timings import track_table
+from django_tables2.renderers import (is_native_template, NativeRenderer,
+                                      nospaceless as nospaceless_html,
+                                      render_value)
 import re
 import StringIO
+import time
 import tokenize
 
 
@@ -141,6 +149,31 @@ def querystring(parser, token):
     return QuerystringNode(updates, removals)
 
 
+# Table classes generated for the querysets given to {% render_table %}, keyed
+# by model.
+_on_the_fly_tables = {}
+
+
+def on_the_fly_table(model):
+    """
+    Return the `.Table` class that ``{% render_table %}`` uses for querysets
+    of *model*. It's created (introspecting the model) the first time it's
+    needed, and reused afterwards.
+    """
+    try:
+        return _on_the_fly_tables[model]
+    except KeyError:
+        pass
+    table_model = model
+
+    class OnTheFlyTable(tables.Table):
+        class Meta:
+            model = table_model
+            attrs = {"class": "paleblue"}
+    # If two threads get here at once, one of the classes is discarded.
+    return _on_the_fly_tables.setdefault(model, OnTheFlyTable)
+
+
 class RenderTableNode(Node):
     """
     :param    table: the table to render
@@ -159,15 +192,9 @@ class RenderTableNode(Node):
         if isinstance(table, tables.Table):
             pass
         elif hasattr(table, "model"):
-            queryset = table
-
             # We've been given a queryset, create a table using its model and
             # render that.
-            class OnTheFlyTable(tables.Table):
-                class Meta:
-                    model = queryset.model
-                    attrs = {"class": "paleblue"}
-            table = OnTheFlyTable(queryset)
+            table = on_the_fly_table(table.model)(table)
             request = context.get('request')
             if request:
                 RequestConfig(request).configure(table)
@@ -176,20 +203,28 @@ class RenderTableNode(Node):
                              type(table).__name__)
 
         if self.template:
-            template = self.template.resolve(context)
+            template_name = self.template.resolve(context)
         else:
-            template = table.template
+            template_name = table.template
 
-        if isinstance(template, basestring):
-            template = get_template(template)
+        request = context.get("request")
+        if (table._meta.native_rendering
+                and isinstance(template_name, basestring)
+                and is_native_template(template_name)):
+            render = lambda: NativeRenderer(table, request).render(context)
         else:
-            # assume some iterable was given
-            template = select_template(template)
+            if isinstance(template_name, basestring):
+                template = get_template(template_name)
+            else:
+                # assume some iterable was given
+                template = select_template(template_name)
+            render = lambda: template.render(context)
 
         # Contexts are basically a `MergeDict`, when you `update()`, it
         # internally just adds a dict to the list to attempt lookups from. This
         # is why we're able to `pop()` later.
         context.update({"table": table})
+        started = time.time()
         try:
             # HACK:
             # TemplateColumn benefits from being able to use the context
@@ -197,10 +232,16 @@ class RenderTableNode(Node):
             # achieved is to temporarily attach the context to the table,
             # which TemplateColumn then looks for and uses.
             table.context = context
-            return template.render(context)
+            # Unless it's paginated, the table's rows are only iterated once.
+            with table.data.chunked(getattr(table, "page", None) is None):
+                return render_cached(table, lambda: render_recorded(table, render),
+                                     request, template_name)
         finally:
             del table.context
             context.pop()
+            table.timings.add("render", time.time() - started)
+            if request is not None:
+                track_table(request, table)
 
 @register.tag
 def render_table(parser, token):
@@ -216,8 +257,8 @@ def render_table(parser, token):
         {% render_table table "custom.html" %}
         {% render_table user_queryset %}
 
-    When given a queryset, a `.Table` class is generated dynamically as
-    follows::
+    When given a queryset, a `.Table` class is generated dynamically (once
+    per model) as follows::
 
         class OnTheFlyTable(tables.Table):
             class Meta:
@@ -257,6 +298,47 @@ def nospaceless(parser, token):
     return NoSpacelessNode(nodelist)
 
 
+RE_LINE_BREAK = re.compile(r"\s*\n\s*")
+
+
+class CompactNode(Node):
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+        super(CompactNode, self).__init__()
+
+    def render(self, context):
+        return self.nodelist.render(context)
+
+
+@register.tag
+def compact(parser, token):
+    """
+    Removes the line breaks (and the indentation around them) from the
+    template's source, rather than from the rendered output, so it costs
+    nothing when the template is rendered. Whitespace that's needed must be
+    written explicitly, e.g. as ``&#32;``.
+
+    Example::
+
+        {% compact %}
+        <ul>
+            <li>a</li>&#32;
+            <li>b</li>
+        </ul>
+        {% endcompact %}
+
+    renders as ``<ul><li>a</li>&#32;<li>b</li></ul>``.
+
+    Only the template's own source is affected, not the content of blocks
+    overridden by a template that extends it.
+    """
+    nodelist = parser.parse(('endcompact',))
+    parser.delete_first_token()
+    for node in nodelist.get_nodes_by_type(TextNode):
+        node.s = RE_LINE_BREAK.sub("", node.s)
+    return CompactNode(nodelist)
+
+
 RE_UPPERCASE = re.compile('[A-Z]')
 
 
@@ -274,3 +356,59 @@ def title(value):
     return re.sub('(\S+)', lambda m: title_word(m.group(0)), value)
 title.is_safe = True
 
+
+@register.filter
+def between_tags(value):
+    """
+    Replaces the whitespace between tags in a value that's output between two
+    tags (e.g. a cell's content) with ``&#32;``, the same way wrapping the
+    markup around it in ``{% nospaceless %}`` does.
+
+    Used with ``{% filter %}`` by ``django_tables2/table_compact.html``, so
+    only the values that could contain such whitespace are searched, rather
+    than the whole table.
+    """
+    value = force_unicode(value)
+    return nospaceless_html(">%s<" % value, value)[1:-1]
+between_tags.is_safe = True
+
+
+@register.filter
+def row_group(row):
+    """
+    Returns the `.BoundGroup` that a row starts (see `.BoundRow.group`), or
+    `None`.
+
+    Used by the default templates rather than ``row.group``, which renders
+    the cell of a column called ``group`` instead (the template language
+    tries ``row["group"]`` before the attribute).
+    """
+    return getattr(row, "group", None)
+
+
+class RenderBetweenTagsNode(Node):
+    def __init__(self, value):
+        self.value = value
+        super(RenderBetweenTagsNode, self).__init__()
+
+    def render(self, context):
+        value = render_value(self.value.resolve(context), context)
+        return nospaceless_html(">%s<" % value, value)[1:-1]
+
+
+@register.tag
+def render_between_tags(parser, token):
+    """
+    Outputs a value the same way ``{{ value }}`` does, passed through the
+    `between_tags` filter. It's cheaper than wrapping ``{{ value }}`` in
+    ``{% filter between_tags %}``, which matters for the cells of a table.
+
+    Example::
+
+        <td>{% render_between_tags cell %}</td>
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise TemplateSyntaxError("'%s' takes a single argument" % bits[0])
+    return RenderBetweenTagsNode(parser.compile_filter(bits[1]))
+
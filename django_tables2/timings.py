@@ -0,0 +1,122 @@
+# coding: utf-8
+"""
+Timing of the phases of producing a table (counting, sorting, paginating,
+fetching the rows and rendering), reported as ``Server-Timing`` headers.
+"""
+from __future__ import absolute_import, unicode_literals
+from django.utils.datastructures import SortedDict
+import logging
+import re
+
+
+logger = logging.getLogger("django_tables2")
+
+RE_NOT_TOKEN = re.compile(r"[^A-Za-z0-9!#$%&'*+.^_`|~-]+")
+
+# The request attribute listing the tables used to respond to a request (set
+# by ServerTimingMiddleware).
+REQUEST_TABLES = "_tables2_tables"
+
+
+class Timings(object):
+    """
+    The seconds spent in each phase of producing a table, see
+    `.Table.timings`. The phases are:
+
+    - ``count`` -- counting the rows (`len` of the table's data)
+    - ``sort`` -- ordering the data (sorting it, for list data)
+    - ``paginate`` -- `.Table.paginate`, including counting the rows
+    - ``fetch`` -- fetching the records of the rows being rendered (and
+      loading their values, see :ref:`table.load_foo`)
+    - ``render`` -- rendering the table's HTML, including fetching
+
+    Phases that happen more than once are added up. Phases that didn't happen
+    are missing.
+    """
+    def __init__(self):
+        self.phases = SortedDict()
+
+    def add(self, phase, seconds):
+        """
+        Add *seconds* to the time spent in *phase*.
+        """
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def __getitem__(self, phase):
+        return self.phases[phase]
+
+    def __contains__(self, phase):
+        return phase in self.phases
+
+    def __iter__(self):
+        return iter(self.phases)
+
+    def items(self):
+        return self.phases.items()
+
+    def server_timing(self, name):
+        """
+        Return the timings as the value of a ``Server-Timing`` header, with
+        metrics called ``<name>.<phase>`` and durations in milliseconds, e.g.
+        ``persontable.count;dur=1.3, persontable.render;dur=20.7``.
+        """
+        name = RE_NOT_TOKEN.sub("-", name)
+        return ", ".join('%s.%s;dur=%.1f' % (name, phase, seconds * 1000)
+                         for phase, seconds in self.phases.items())
+
+
+def track_table(request, table):
+    """
+    Note that *table* is used to respond to *request*, so that its timings
+    are reported by `.ServerTimingMiddleware` (if it's installed).
+    """
+    tables = getattr(request, REQUEST_TABLES, None)
+    if tables is not None and table not in tables:
+        tables.append(table)
+
+
+class ServerTimingMiddleware(object):
+    """
+    Adds the timings (see `.Table.timings`) of the tables that were
+    configured with `.RequestConfig` or rendered with ``{% render_table %}``
+    to the response's ``Server-Timing`` header, which browsers show with
+    the request's network timings.
+
+    Tables whose rendering took longer than `.slow_render` seconds are
+    logged to the ``django_tables2`` logger (as warnings).
+
+    .. code-block:: python
+
+        MIDDLEWARE_CLASSES = (
+            ...
+            "django_tables2.timings.ServerTimingMiddleware",
+        )
+    """
+    #: Seconds after which rendering a table is logged (`None` to disable).
+    slow_render = 1.0
+
+    def process_request(self, request):
+        setattr(request, REQUEST_TABLES, [])
+
+    def process_response(self, request, response):
+        tables = getattr(request, REQUEST_TABLES, None)
+        if not tables:
+            return response
+        metrics = []
+        for table in tables:
+            name = table.prefix or type(table).__name__.lower()
+            if table.timings.phases:
+                metrics.append(table.timings.server_timing(name))
+            rendering = table.timings.phases.get("render")
+            if (self.slow_render is not None and rendering is not None
+                    and rendering > self.slow_render):
+                logger.warning("Rendering %s took %.2f seconds (%s) for %s",
+                               type(table).__name__, rendering,
+                               ", ".join("%s: %.3f" % item
+                                         for item in table.timings.items()),
+                               request.path)
+        if metrics:
+            if response.has_header("Server-Timing"):
+                metrics.insert(0, response["Server-Timing"])
+            response["Server-Timing"] = ", ".join(metrics)
+        return response
@@ -9,6 +9,7 @@ from itertools import chain, ifilter
 import inspect
 from StringIO import StringIO
 import warnings
+import zlib
 
 
 class Sequence(list):
@@ -434,6 +435,18 @@ getargspec = getattr(inspect, next(funcs))
 del funcs
 
 
+def has_aggregates(query):
+    """
+    Return `True` if *query* has aggregate annotations.
+    """
+    annotations = getattr(query, "annotations", None)
+    if annotations is None:
+        # Django < 1.8
+        return bool(query.aggregates)
+    return any(getattr(annotation, "contains_aggregate", True)
+               for annotation in annotations.values())
+
+
 def build_request(uri='/'):
     """
     Return a fresh HTTP GET / request.
@@ -460,3 +473,37 @@ def build_request(uri='/'):
             'wsgi.multithread':  False,
             'wsgi.run_once':     False,
         })
+
+
+def gzip_chunks(chunks, level=6, flush_size=64 * 1024):
+    """
+    Compress an iterable of chunks using gzip, incrementally.
+
+    :param     chunks: iterable of `bytes` (`unicode` is encoded as UTF-8)
+    :type       level: `int`
+    :param      level: compression level, from ``1`` (fastest) to ``9``
+                       (smallest)
+    :type  flush_size: `int`
+    :param flush_size: number of (uncompressed) bytes after which the
+                       compressed output is flushed and yielded, `None` to
+                       only yield once all of the chunks are compressed
+    :returns: iterator yielding the compressed output (a single gzip member)
+
+    Flushing lets the client receive (and decompress) the output as it's
+    produced, at a small cost to the compression ratio.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    output = []
+    pending = 0
+    for chunk in chunks:
+        if isinstance(chunk, unicode):
+            chunk = chunk.encode("utf-8")
+        output.append(compressor.compress(chunk))
+        pending += len(chunk)
+        if flush_size and pending >= flush_size:
+            output.append(compressor.flush(zlib.Z_SYNC_FLUSH))
+            yield b"".join(output)
+            output = []
+            pending = 0
+    output.append(compressor.flush())
+    yield b"".join(output)
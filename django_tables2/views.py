@@ -1,7 +1,35 @@
 # coding: utf-8
 from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.template.defaultfilters import slugify
+from django.utils.cache import patch_vary_headers
+from django.utils.http import (http_date, parse_etags, parse_http_date_safe,
+                               quote_etag)
+from django.utils.translation import get_language
 from django.views.generic.list import ListView
+import calendar
+import datetime
+import hashlib
+import json
+import os
+import re
+from wsgiref.util import FileWrapper
 from .config import RequestConfig
+from .export import formats as export_formats
+from .jobs import DEFAULT_DIRECTORY, FAILED, FINISHED, load_state, RE_JOB_ID
+from .renderers import StreamingRenderer
+from .tables import Table
+from .utils import gzip_chunks
+
+try:
+    from django.http import StreamingHttpResponse
+except ImportError:
+    # Django < 1.5, an iterator given to HttpResponse is streamed as well.
+    from django.http import HttpResponse as StreamingHttpResponse
+
+
+RE_ACCEPTS_GZIP = re.compile(r"\bgzip\b")
 
 
 class SingleTableMixin(object):
@@ -20,6 +48,29 @@ class SingleTableMixin(object):
                                the *paginate* keyword argument to
                                `.RequestConfig`. As such, any non-`False`
                                value enables pagination.
+    :param    table_streaming: if not `False`, the response is the table's
+                               HTML, streamed using `.StreamingRenderer`. If a
+                               `dict`, it's passed as keyword arguments to the
+                               renderer (e.g. ``{"chunk_size": 1000}``).
+    :param table_export_formats: names of the export formats (e.g. ``"csv"``)
+                               that can be requested via the querystring
+    :param table_export_field: querystring field used to request an export
+                               (default: "export"). Exports can also be
+                               requested via the ``Accept`` header.
+    :param   table_export_raw: export the data's values rather than the
+                               rendered values (see `.TableExport`). The
+                               default, `None`, uses each format's default
+                               (only ``xlsx`` exports the data's values).
+    :param         table_gzip: if not `False`, exports and streamed responses
+                               are compressed with gzip (when the client
+                               accepts it). If a `dict`, it's passed as
+                               keyword arguments to `.gzip_chunks` (e.g.
+                               ``{"level": 9}``).
+    :param table_version_field: name of a field that's updated whenever a
+                               record changes (e.g. ``"updated_at"``). If set,
+                               responses have ``ETag`` and ``Last-Modified``
+                               headers, and conditional requests for an
+                               unchanged table get a ``304 Not Modified``.
 
     This mixin plays nice with the Django's`.MultipleObjectMixin` by using
     `.get_queryset`` as a fallback for the table data source.
@@ -29,6 +80,12 @@ class SingleTableMixin(object):
     table_data = None
     context_table_name = None
     table_pagination = None
+    table_streaming = False
+    table_export_formats = ()
+    table_export_field = "export"
+    table_export_raw = None
+    table_gzip = False
+    table_version_field = None
 
     def get_table(self, **kwargs):
         """
@@ -39,6 +96,10 @@ class SingleTableMixin(object):
         table_class = self.get_table_class()
         table = table_class(self.get_table_data(), **kwargs)
         paginate = self.get_table_pagination()  # pylint: disable=E1102
+        export_format = self.get_table_export_format()
+        if export_format and not export_formats[export_format].paginated:
+            # the export includes every row
+            paginate = False
         if paginate is not None:
             options['paginate'] = paginate
         RequestConfig(self.request, **options).configure(table)
@@ -79,6 +140,142 @@ class SingleTableMixin(object):
         """
         return self.table_pagination
 
+    def get_table_streaming(self):
+        """
+        Returns streaming options: False to render the template as usual
+        (default), True to stream the table, and a dictionary for custom
+        `.StreamingRenderer` options.
+        """
+        return self.table_streaming
+
+    def get_table_gzip(self):
+        """
+        Returns the options for `.gzip_chunks` (a dictionary) if streamed
+        responses should be compressed, otherwise None.
+        """
+        gzip = self.table_gzip
+        if not gzip:
+            return None
+        if not RE_ACCEPTS_GZIP.search(self.request.META.get("HTTP_ACCEPT_ENCODING", "")):
+            return None
+        return dict(gzip) if hasattr(gzip, "items") else {}
+
+    def get_table_version(self):
+        """
+        Returns a ``(etag, last_modified)`` tuple identifying the current
+        version of the table, or None if `.table_version_field` isn't set (or
+        the table's data isn't a queryset).
+
+        The version is determined using a single query of the latest value
+        of `.table_version_field` and the number of records. *last_modified*
+        is a timestamp, or None if the field isn't a date/time.
+        """
+        field = self.table_version_field
+        data = self.get_table_data()
+        if not field or not hasattr(data, "aggregate"):
+            return None
+        version = data.aggregate(latest=Max(field), count=Count("pk"))
+        latest = version["latest"]
+        parts = [type(self).__module__, type(self).__name__, latest,
+                 version["count"], get_language(), self.get_table_export_format(),
+                 self.get_table_gzip() is not None]
+        etag = hashlib.md5(repr(parts).encode("utf-8")).hexdigest()
+        if isinstance(latest, datetime.datetime):
+            last_modified = calendar.timegm(latest.utctimetuple())
+        elif isinstance(latest, datetime.date):
+            last_modified = calendar.timegm(latest.timetuple())
+        else:
+            last_modified = None
+        return etag, last_modified
+
+    def table_not_modified(self, etag, last_modified):
+        """
+        Returns True if the request is conditional and the client's copy of
+        the table (described by *etag* and *last_modified*) is current.
+        """
+        meta = self.request.META
+        if "HTTP_IF_NONE_MATCH" in meta:
+            etags = parse_etags(meta["HTTP_IF_NONE_MATCH"])
+            return "*" in etags or etag in etags
+        since = parse_http_date_safe(meta.get("HTTP_IF_MODIFIED_SINCE", ""))
+        return (since is not None and last_modified is not None
+                and last_modified <= since)
+
+    def get(self, request, *args, **kwargs):
+        """
+        Overriden version of the view's ``get`` to respond to conditional
+        requests without building the table if `.table_version_field` is set.
+        """
+        version = self.get_table_version()
+        if version is not None and self.table_not_modified(*version):
+            response = HttpResponseNotModified()
+        else:
+            response = super(SingleTableMixin, self).get(request, *args, **kwargs)
+        if version is not None:
+            etag, last_modified = version
+            response["ETag"] = quote_etag(etag)
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        if self.table_export_formats:
+            # The response depends on the Accept header (see
+            # get_table_export_format), caches have to know that.
+            patch_vary_headers(response, ("Accept", ))
+        return response
+
+    def get_table_export_format(self):
+        """
+        Returns the name of the export format requested via the querystring
+        (or ``Accept`` header), or `None` if an export wasn't requested (or
+        isn't allowed).
+        """
+        if self.table_export_field in self.request.GET:
+            export_format = self.request.GET[self.table_export_field]
+            if export_format in self.table_export_formats:
+                return export_format
+            return None
+        # Content negotiation, e.g. an AJAX request for application/json.
+        # Preferred media types come first, and HTML wins a tie.
+        accept = []
+        for index, media_range in enumerate(
+                self.request.META.get("HTTP_ACCEPT", "").split(",")):
+            media_type, _, params = media_range.partition(";")
+            quality = 1.0
+            for param in params.split(";"):
+                key, _, value = param.partition("=")
+                if key.strip() == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        pass
+            accept.append((-quality, index, media_type.strip()))
+        for _, _, media_type in sorted(accept):
+            if media_type in ("text/html", "*/*"):
+                return None
+            for name in self.table_export_formats:
+                if export_formats[name].content_type == media_type:
+                    return name
+
+    def get_table_export_filename(self, table, export):
+        """
+        Returns the filename for an export of the table.
+        """
+        return "%s.%s" % (slugify(table.data.verbose_name_plural),
+                          export.extension)
+
+    def render_table_export(self, table, export_format):
+        """
+        Returns a streaming response containing the table exported in the
+        given format.
+        """
+        export = export_formats[export_format](table, raw=self.table_export_raw)
+        response = self.streaming_response(export, content_type=export.content_type)
+        if self.table_export_field in self.request.GET:
+            # Exports negotiated via the Accept header (e.g. a page of JSON
+            # for an AJAX request) aren't downloads.
+            response["Content-Disposition"] = ('attachment; filename="%s"'
+                    % self.get_table_export_filename(table, export))
+        return response
+
     def get_context_data(self, **kwargs):
         """
         Overriden version of `.TemplateResponseMixin` to inject the table into
@@ -89,8 +286,97 @@ class SingleTableMixin(object):
         context[self.get_context_table_name(table)] = table
         return context
 
+    def render_to_response(self, context, **response_kwargs):
+        """
+        Overriden version of `.TemplateResponseMixin` to return an export of
+        the table if one was requested, or a streaming response of the table's
+        HTML if `.table_streaming` is enabled.
+        """
+        export_format = self.get_table_export_format()
+        if export_format:
+            return self.render_table_export(self.get_context_table(context),
+                                            export_format)
+        streaming = self.get_table_streaming()
+        if not streaming:
+            return super(SingleTableMixin, self).render_to_response(
+                    context, **response_kwargs)
+        options = dict(streaming) if hasattr(streaming, "items") else {}
+        renderer = StreamingRenderer(self.get_context_table(context),
+                                     self.request, **options)
+        return self.streaming_response(renderer)
+
+    def get_context_table(self, context):
+        """
+        Returns the table that `.get_context_data` added to *context*, so it
+        isn't built (and its data fetched) again, or a new table if there
+        isn't one.
+        """
+        for name, value in context.items():
+            if (isinstance(value, Table)
+                    and name == self.get_context_table_name(value)):
+                return value
+        return self.get_table()
+
+    def streaming_response(self, content, **kwargs):
+        """
+        Returns a streaming response of *content* (an iterator), compressed if
+        `.table_gzip` is enabled.
+        """
+        gzip = self.get_table_gzip()
+        if gzip is not None:
+            content = gzip_chunks(content, **gzip)
+        response = StreamingHttpResponse(content, **kwargs)
+        if self.table_gzip:
+            patch_vary_headers(response, ("Accept-Encoding", ))
+        if gzip is not None:
+            response["Content-Encoding"] = "gzip"
+        return response
+
 
 class SingleTableView(SingleTableMixin, ListView):
     """
     Generic view that renders a template and passes in a `.Table` object.
     """
+
+
+def export_job_response(request, job_id, directory=None):
+    """
+    Return a response for an `.ExportJob`: the exported file if the job has
+    finished, otherwise its status as JSON, e.g.:
+
+    .. code-block:: javascript
+
+        {"id": "8e2f...", "status": "running", "rows": 2000, "total": 10000}
+
+    The status response has a ``202 Accepted`` status code while the job is
+    pending or running, and ``500`` if it failed. Unknown jobs raise
+    `~django.http.Http404`.
+
+    :param    job_id: the job's `~.ExportJob.job_id`
+    :param directory: the job's directory (if not the default)
+
+    Wrap it in a view to use it (checking that the user is allowed to
+    download the export):
+
+    .. code-block:: python
+
+        def export_status(request, job_id):
+            return export_job_response(request, job_id)
+    """
+    state = load_state(job_id, directory) if RE_JOB_ID.match(job_id) else None
+    if state is None:
+        raise Http404("No export job %r" % job_id)
+    status = state["status"]
+    if status == FINISHED:
+        path = os.path.join(directory or DEFAULT_DIRECTORY, state["filename"])
+        response = StreamingHttpResponse(FileWrapper(open(path, "rb")),
+                                         content_type=state["content_type"])
+        response["Content-Length"] = state["size"]
+        response["Content-Disposition"] = ('attachment; filename="%s"'
+                                           % state["filename"])
+        return response
+    body = {"id": state["id"], "status": status, "rows": state.get("rows", 0),
+            "total": state.get("total")}
+    response = HttpResponse(json.dumps(body), content_type="application/json")
+    response.status_code = 500 if status == FAILED else 202
+    return response
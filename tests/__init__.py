@@ -5,9 +5,11 @@ os.environ['DJANGO_SETTINGS_MODULE'] = 'tests.app.settings'
 
 from attest import Tests
 import django_attest
+from .cache import cache
 from .columns import columns
 from .config import config
 from .core import core
+from .export import export
 from .models import models
 from .rows import rows
 from .templates import templates
@@ -16,8 +18,8 @@ from .views import views
 
 
 loader = django_attest.FancyReporter.test_loader
-everything = Tests([columns, config, core, models, rows, templates, utils,
-                    views])
+everything = Tests([cache, columns, config, core, export, models, rows, templates,
+                    utils, views])
 
 
 # -----------------------------------------------------------------------------
@@ -0,0 +1,15 @@
+# coding: utf-8
+import django_tables2 as tables
+from .models import Person
+
+
+class PersonTable(tables.Table):
+    name = tables.Column(accessor='first_name', order_by=('last_name', 'first_name'))
+    occupation = tables.Column()
+    occupation_name = tables.Column(accessor='occupation.name')
+    region = tables.Column(accessor='occupation.region.name', orderable=False)
+    mayor_of = tables.Column(accessor='region.name')
+
+    class Meta:
+        model = Person
+        fields = ('id', )
@@ -0,0 +1,226 @@
+# coding: utf-8
+from __future__ import absolute_import, unicode_literals
+from attest import assert_hook, Tests  # pylint: disable=W0611
+from django.core.cache import cache as default_cache
+from django.template import Context, Template
+from django.utils.translation import override
+from django_attest import queries, TestContext
+import django_tables2 as tables
+from django_tables2.cache import (cache_key, model_key, render_cached,
+                                  table_models)
+from django_tables2.renderers import StreamingRenderer
+from django_tables2.utils import build_request
+from .app.models import Occupation, Person, Region
+
+
+cache = Tests()
+cache.context(TestContext())
+
+
+@cache.context
+def empty_cache():
+    default_cache.clear()
+    yield
+
+
+class CachedPersonTable(tables.Table):
+    first_name = tables.Column()
+    occupation = tables.Column(accessor='occupation.name')
+
+    class Meta:
+        cache_timeout = 60
+
+
+@cache.test
+def table_models_follow_accessors():
+    class RegionTable(tables.Table):
+        name = tables.Column()
+        region = tables.Column(accessor='occupation.region.name')
+        mayor = tables.Column(accessor='region.name')
+
+    table = RegionTable(Person.objects.all())
+    assert table_models(table) == [Person, Occupation, Region]
+
+
+@cache.test
+def as_html_is_cached_until_a_model_changes():
+    occupation = Occupation.objects.create(name='Carpenter')
+    person = Person.objects.create(first_name='Bradley', last_name='Ayers',
+                                   occupation=occupation)
+    html = CachedPersonTable(Person.objects.all()).as_html()
+    assert 'Carpenter' in html
+
+    with queries(count=0):
+        cached = CachedPersonTable(Person.objects.all()).as_html()
+    assert cached == html
+
+    # saving a related model invalidates the table
+    occupation.name = 'Plumber'
+    occupation.save()
+    html = CachedPersonTable(Person.objects.all()).as_html()
+    assert 'Plumber' in html
+
+    person.delete()
+    assert 'Bradley' not in CachedPersonTable(Person.objects.all()).as_html()
+
+
+@cache.test
+def only_models_of_cached_tables_invalidate_the_cache():
+    incremented = []
+    incr = default_cache.incr
+
+    def record(key, *args, **kwargs):
+        incremented.append(key)
+        return incr(key, *args, **kwargs)
+
+    default_cache.incr = record
+    try:
+        CachedPersonTable(Person.objects.all()).as_html()
+        Region.objects.create(name='Queensland')
+        assert incremented == []
+        Person.objects.create(first_name='Bradley', last_name='Ayers')
+        assert incremented == [model_key(Person)]
+
+        # Meta.model is connected when the table is defined
+        class CachedRegionTable(tables.Table):
+            class Meta:
+                model = Region
+                cache_timeout = 60
+
+        Region.objects.create(name='Tasmania')
+        assert incremented == [model_key(Person), model_key(Region)]
+    finally:
+        del default_cache.incr
+
+
+@cache.test
+def cache_key_varies_with_the_rendering():
+    for name in ('Bradley', 'Chris', 'Davina'):
+        Person.objects.create(first_name=name, last_name='x')
+
+    def key(order_by=None, page=1, request=None, **kwargs):
+        table = CachedPersonTable(Person.objects.all(), order_by=order_by, **kwargs)
+        table.paginate(page=page, per_page=2)
+        return cache_key(table, request, 'django_tables2/table.html')
+
+    first = key()
+    assert first == key()
+    assert first != key(order_by='first_name')
+    assert first != key(page=2)
+    assert first != key(prefix='p-')
+    assert first != key(request=build_request('/?foo=bar'))
+    with override('fr'):
+        assert first != key()
+
+    # request-derived parts
+    class PerUserPersonTable(CachedPersonTable):
+        class Meta:
+            cache_timeout = 60
+            cache_vary_on = ('user.pk', )
+
+    def user_key(user_pk):
+        request = build_request('/')
+        request.user = type(str('User'), (object, ), {'pk': user_pk})()
+        return cache_key(PerUserPersonTable(Person.objects.all()), request)
+
+    assert user_key(1) == user_key(1)
+    assert user_key(1) != user_key(2)
+    assert key(request=build_request('/')) == key(request=build_request('/'))
+
+    class PersonTable(tables.Table):
+        first_name = tables.Column()
+
+    assert cache_key(PersonTable(Person.objects.all())) is None
+    assert cache_key(CachedPersonTable([])) is None
+
+
+@cache.test
+def stale_entries_are_served_while_revalidating():
+    class StaleTable(CachedPersonTable):
+        class Meta:
+            cache_timeout = 0
+            cache_stale_timeout = 60
+
+    Person.objects.create(first_name='Bradley', last_name='Ayers')
+    calls = []
+
+    def render(table):
+        def render_table():
+            calls.append(1)
+            return '%d' % len(calls)
+        return render_cached(table, render_table)
+
+    table = StaleTable(Person.objects.all())
+    first = render(table)
+    # stale, so this request renders it again
+    second = render(table)
+    # while another request holds the lock, the stale entry is served
+    default_cache.add(cache_key(table) + ':lock', 1)
+    third = render(table)
+    assert (first, second, third) == ('1', '2', '2')
+    assert len(calls) == 2
+
+
+@cache.test
+def render_table_tag_is_cached():
+    Person.objects.create(first_name='Bradley', last_name='Ayers')
+    template = Template('{% load django_tables2 %}{% render_table table %}')
+    request = build_request('/')
+
+    def render():
+        table = CachedPersonTable(Person.objects.all())
+        tables.RequestConfig(request, paginate=False).configure(table)
+        return template.render(Context({'request': request, 'table': table}))
+
+    html = render()
+    with queries(count=0):
+        cached = render()
+    assert cached == html
+
+
+class RowCachedPersonTable(tables.Table):
+    first_name = tables.Column()
+    last_name = tables.Column()
+    renders = []
+
+    class Meta:
+        row_cache_timeout = 60
+        row_cache_version = 'last_name'
+
+    def render_first_name(self, value):
+        RowCachedPersonTable.renders.append(value)
+        return '<%s>' % value
+
+
+@cache.test
+def rows_are_cached_by_version():
+    for name in ('Bradley', 'Chris', 'Davina'):
+        Person.objects.create(first_name=name, last_name='x')
+    renders = RowCachedPersonTable.renders
+    del renders[:]
+
+    class UncachedTable(RowCachedPersonTable):
+        class Meta:
+            row_cache_timeout = None
+
+    expected = UncachedTable(Person.objects.all()).as_html()
+    del renders[:]
+
+    html = RowCachedPersonTable(Person.objects.all()).as_html()
+    assert html == expected
+    assert renders == ['Bradley', 'Chris', 'Davina']
+    html = RowCachedPersonTable(Person.objects.all()).as_html()
+    assert html == expected
+    assert len(renders) == 3
+
+    # only the row whose version changed is rendered again
+    Person.objects.filter(first_name='Chris').update(last_name='y')
+    table = RowCachedPersonTable(Person.objects.all())
+    chunks = ''.join(StreamingRenderer(table))
+    assert renders[3:] == ['Chris']
+    assert chunks == UncachedTable(Person.objects.all()).as_html()
+
+    # exports don't use the row cache
+    del renders[:]
+    list(RowCachedPersonTable(Person.objects.all()).as_csv())
+    assert len(renders) == 3
@@ -13,7 +13,7 @@ from django.core.urlresolvers import reverse
 from django.core.files.base import ContentFile
 from django.core.files.storage import FileSystemStorage
 from django.template import Context, Template
-from django.utils.translation import ugettext
+from django.utils.translation import get_language, override, ugettext
 from django.utils.safestring import mark_safe, SafeData
 try:
     from django.utils import timezone
@@ -21,6 +21,7 @@ except ImportError:
     timezone = None
 from os.path import dirname, join
 import pytz
+import threading
 from .app.models import Person
 from .templates import attrs, parse
 
@@ -113,6 +114,55 @@ def new_attrs_should_be_supported():
     assert attrs(table.rows[0]["col2"])        == {"type": "checkbox", "key": "value", "value": "data", "name": "col2"}
 
 
+concurrentcolumn = Tests()
+
+
+@concurrentcolumn.test
+def loaders_run_concurrently():
+    started = threading.Event()
+
+    def load_first(records):
+        # Only finishes in time if the other loader is running meanwhile.
+        return dict((r['pk'], started.wait(5) and 'first') for r in records)
+
+    class Table(tables.Table):
+        first = tables.ConcurrentColumn(load_first)
+        second = tables.ConcurrentColumn()
+        language = tables.ConcurrentColumn(lambda records: {1: get_language()})
+
+        def load_second(self, records):
+            started.set()
+            return dict((r['pk'], r['name']) for r in records)
+
+    table = Table([{'pk': 1, 'name': 'Bradley'}, {'pk': 2, 'name': 'Chris'}])
+    with override('fr'):
+        cells = [list(row) for row in table.rows]
+    assert cells == [['first', 'Bradley', 'fr'], ['first', 'Chris', '—']]
+
+
+@concurrentcolumn.test
+def loaders_fall_back_when_they_fail():
+    release = threading.Event()
+
+    def load_slowly(records):
+        release.wait(5)
+        return {1: 'slow'}
+
+    def load_badly(records):
+        raise ValueError('service unavailable')
+
+    class Table(tables.Table):
+        slow = tables.ConcurrentColumn(load_slowly, timeout=0.05, fallback='n/a')
+        bad = tables.ConcurrentColumn(load_badly, default='?')
+        good = tables.ConcurrentColumn(lambda records: {1: 'good'}, timeout=5)
+
+    try:
+        cells = [list(row) for row in Table([{'pk': 1}]).rows]
+    finally:
+        release.set()
+    assert cells == [['n/a', '?', 'good']]
+
+
 general = Tests()
 
 
@@ -834,6 +884,6 @@ def filecolumn_supports_fieldfile(column, storage):
     assert root.text == "does_not_exist.html"
 
 
-columns = Tests([booleancolumn, checkboxcolumn, datecolumn, datetimecolumn,
-                 emailcolumn, filecolumn, general, linkcolumn, templatecolumn,
-                 urlcolumn])
+columns = Tests([booleancolumn, checkboxcolumn, concurrentcolumn, datecolumn,
+                 datetimecolumn, emailcolumn, filecolumn, general, linkcolumn,
+                 templatecolumn, urlcolumn])
@@ -4,6 +4,7 @@ from __future__ import absolute_import
 from attest import assert_hook, raises, Tests, warns
 import copy
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db.models import Max
 import django_tables2 as tables
 from django_tables2.tables import DeclarativeColumnsMetaclass
 from haystack.query import SearchQuerySet
@@ -596,3 +597,75 @@ def list_table_data_supports_ordering():
     assert table.rows[0]["name"] == "Bradley"
     table.order_by = "-name"
     assert table.rows[0]["name"] == "Stevie"
+
+
+@core.test
+def footer_aggregates_of_list_data():
+    class FooterTable(tables.Table):
+        name = tables.Column(footer='count')
+        population = tables.Column(footer='sum')
+        smallest = tables.Column(accessor='population', footer='min')
+        largest = tables.Column(accessor='population', footer=Max('population'))
+        average = tables.Column(accessor='population', footer='avg')
+        capital = tables.Column()
+
+    data = [{'name': 'Germany', 'population': 83, 'capital': 'Berlin'},
+            {'name': 'France', 'population': 64},
+            {'name': 'Netherlands'},
+            {'name': 'Austria', 'population': 8}]
+    table = FooterTable(data)
+    assert table.has_footer
+    footer = [column.footer for column in table.columns]
+    assert footer == [4, 155, 8, 83, 155 / 3.0, '']
+    assert not UnorderedTable(MEMORY_DATA).has_footer
+    assert FooterTable([]).columns['population'].footer == ''
+
+
+@core.test
+def equal_records_keep_their_original_order():
+    data = [{'name': 'Bradley', 'age': 30},
+            {'name': 'Chris', 'age': 20},
+            {'name': 'Adam', 'age': 30},
+            {'name': 'Davina', 'age': 20}]
+
+    class PersonTable(tables.Table):
+        name = tables.Column()
+        age = tables.Column()
+
+    table = PersonTable(data)
+    table.order_by = '-name'
+    table.order_by = 'age'
+    assert [row['name'] for row in table.rows] == ['Chris', 'Davina', 'Bradley', 'Adam']
+    table.order_by = '-age'
+    assert [row['name'] for row in table.rows] == ['Bradley', 'Adam', 'Chris', 'Davina']
+
+
+@core.test
+def grouped_rows_of_list_data():
+    class GroupedTable(tables.Table):
+        continent = tables.Column()
+        name = tables.Column()
+        population = tables.Column(footer='sum')
+
+        class Meta:
+            group_by = 'continent'
+
+    data = [{'continent': 'Europe', 'name': 'Germany', 'population': 83},
+            {'continent': 'Asia', 'name': 'Japan', 'population': 127},
+            {'continent': 'Europe', 'name': 'France', 'population': 64},
+            {'continent': 'Asia', 'name': 'India', 'population': 1210}]
+    table = GroupedTable(data, order_by='name')
+    rows = list(table.rows)
+    assert [row['name'] for row in rows] == ['India', 'Japan', 'France', 'Germany']
+    groups = [list(row.group) if row.group else None for row in rows]
+    assert groups == [['Asia', '', 1337], None, ['Europe', '', 147], None]
+    assert [row.group.count for row in rows if row.group] == [2, 2]
+
+    # the group column's ordering is kept
+    table.order_by = ('-continent', 'name')
+    assert [row['name'] for row in table.rows] == ['France', 'Germany', 'India', 'Japan']
+    table.order_by = ('-name', 'continent')
+    assert [row['name'] for row in table.rows] == ['Japan', 'India', 'Germany', 'France']
+
+    # without grouping
+    assert all(row.group is None for row in UnorderedTable(MEMORY_DATA).rows)
@@ -0,0 +1,402 @@
+# coding: utf-8
+from __future__ import absolute_import, unicode_literals
+from attest import assert_hook, raises, Tests  # pylint: disable=W0611
+from contextlib import contextmanager
+import datetime
+import decimal
+from django_attest import queries, TestContext
+import django_tables2 as tables
+from io import BytesIO
+import json
+import lxml.etree
+from django_tables2.export import CSVExport, column_letter
+from django_tables2.jobs import ExportJob
+from django_tables2.parallel import (check_ordering, ParallelExport,
+                                     shard_ranges, sort_key)
+from django_tables2.views import export_job_response
+from django.http import Http404
+from django.test.client import RequestFactory
+import gzip
+import shutil
+import tempfile
+import zipfile
+from .app.models import Person
+
+
+database = contextmanager(TestContext())
+export = Tests()
+
+
+class CountryTable(tables.Table):
+    name = tables.Column()
+    capital = tables.Column(verbose_name='capital city')
+    eu = tables.BooleanColumn(yesno='yes,no')
+    currency = tables.Column(visible=False)
+
+    def render_name(self, value):
+        return '%s!' % value
+
+
+class PersonTable(tables.Table):
+    first_name = tables.Column()
+    last_name = tables.Column()
+
+
+class MetaOrderedPersonTable(PersonTable):
+    class Meta:
+        order_by = '-first_name'
+
+
+MEMORY_DATA = [
+    {'name': 'Germany', 'capital': 'Berlin', 'eu': True, 'currency': 'Euro'},
+    {'name': 'Norway', 'capital': 'Oslo, "city"', 'eu': False},
+    {'name': 'Österreich', 'eu': True},
+]
+
+
+@export.test
+def csv_export():
+    table = CountryTable(MEMORY_DATA)
+    lines = list(table.as_csv())
+    assert lines == [
+        b'Name,Capital City,Eu\r\n',
+        b'Germany!,Berlin,yes\r\n',
+        b'Norway!,"Oslo, ""city""",no\r\n',
+        '\xd6sterreich!,—,yes\r\n'.encode('utf-8'),
+    ]
+
+
+@export.test
+def csv_export_raw_values():
+    table = CountryTable(MEMORY_DATA, order_by='-name')
+    lines = list(table.as_csv(raw=True))
+    assert lines == [
+        b'Name,Capital City,Eu\r\n',
+        '\xd6sterreich,,True\r\n'.encode('utf-8'),
+        b'Norway,"Oslo, ""city""",False\r\n',
+        b'Germany,Berlin,True\r\n',
+    ]
+
+
+@export.test
+def csv_export_ignores_pagination():
+    table = CountryTable(MEMORY_DATA)
+    table.paginate(per_page=1)
+    assert len(list(CSVExport(table))) == 4
+
+
+@export.test
+def csv_export_queryset():
+    with database():
+        Person.objects.create(first_name="Bradley", last_name="Ayers")
+        Person.objects.create(first_name="Chris", last_name="Doble")
+        table = PersonTable(Person.objects.all(), order_by='first_name')
+        with queries(count=1):
+            lines = list(table.as_csv())
+        assert lines == [b'First Name,Surname\r\n', b'Bradley,Ayers\r\n',
+                         b'Chris,Doble\r\n']
+
+
+@export.test
+def json_export():
+    table = CountryTable(MEMORY_DATA)
+    table.paginate(per_page=2, page=2)
+    data = json.loads(b''.join(table.as_json()))
+    assert data == {
+        'columns': [
+            {'name': 'name', 'header': 'Name', 'orderable': True},
+            {'name': 'capital', 'header': 'Capital City', 'orderable': True},
+            {'name': 'eu', 'header': 'Eu', 'orderable': True},
+        ],
+        'rows': [{'name': 'Österreich!', 'capital': '—', 'eu': 'yes'}],
+        'page': 2,
+        'total': 3,
+    }
+
+    # unpaginated, raw
+    table = CountryTable(MEMORY_DATA)
+    data = json.loads(b''.join(table.as_json(raw=True)))
+    assert data['page'] is None
+    assert data['total'] == 3
+    assert data['rows'][1] == {'name': 'Norway', 'capital': 'Oslo, "city"',
+                               'eu': False}
+
+
+@export.test
+def ndjson_export():
+    class DateTable(tables.Table):
+        name = tables.Column()
+        date = tables.DateColumn()
+
+    table = DateTable([{'name': 'a', 'date': datetime.date(2012, 10, 1)},
+                       {'name': 'b'}])
+    table.paginate(per_page=1)
+    lines = list(table.as_ndjson(raw=True))
+    assert lines == [b'{"name":"a","date":"2012-10-01"}\n',
+                     b'{"name":"b","date":null}\n']
+
+
+def xlsx_cells(chunks):
+    archive = zipfile.ZipFile(BytesIO(b''.join(chunks)))
+    assert '[Content_Types].xml' in archive.namelist()
+    sheet = lxml.etree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+    ns = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+    return [[(c.get('r'), c.get('t'), c.get('s'),
+              ''.join(c.xpath('.//s:v/text()|.//s:t/text()', namespaces=ns)))
+             for c in row.xpath('s:c', namespaces=ns)]
+            for row in sheet.xpath('//s:row', namespaces=ns)]
+
+
+@export.test
+def xlsx_export():
+    class DateTable(tables.Table):
+        name = tables.Column()
+        count = tables.Column()
+        date = tables.DateColumn()
+        when = tables.DateTimeColumn()
+
+    table = DateTable([
+        {'name': 'a <b>', 'count': 3, 'date': datetime.date(2012, 10, 1),
+         'when': datetime.datetime(2012, 10, 1, 12)},
+        {'name': 'b\x07', 'count': 1.5},
+    ])
+    table.paginate(per_page=1)
+    rows = xlsx_cells(table.as_xlsx(raw=True))
+    assert rows[0] == [
+        ('A1', 'inlineStr', '4', 'Name'),
+        ('B1', 'inlineStr', '4', 'Count'),
+        ('C1', 'inlineStr', '4', 'Date'),
+        ('D1', 'inlineStr', '4', 'When'),
+    ]
+    assert rows[1] == [
+        ('A2', 'inlineStr', None, 'a <b>'),
+        ('B2', None, None, '3'),
+        ('C2', None, '1', '41183'),
+        ('D2', None, '2', '41183.5'),
+    ]
+    # empty values are skipped, illegal characters removed
+    assert rows[2] == [('A3', 'inlineStr', None, 'b'), ('B3', None, None, '1.5')]
+
+    # the values from the data are exported by default
+    assert xlsx_cells(table.as_xlsx()) == xlsx_cells(table.as_xlsx(raw=True))
+
+    # rendered values
+    rows = xlsx_cells(table.as_xlsx(raw=False))
+    assert rows[1][0] == ('A2', 'inlineStr', None, 'a <b>')
+    assert rows[1][1] == ('B2', None, None, '3')
+    assert rows[1][2][1] == 'inlineStr'
+    assert rows[2][2] == ('C3', 'inlineStr', None, '—')
+
+    # NaN and infinity aren't valid numbers, they're written as text
+    table = DateTable([{'name': 'a', 'count': float('nan')},
+                       {'name': 'b', 'count': float('-inf')},
+                       {'name': 'c', 'count': decimal.Decimal('Infinity')}])
+    rows = xlsx_cells(table.as_xlsx())
+    assert rows[1][1] == ('B2', 'inlineStr', None, 'nan')
+    assert rows[2][1] == ('B3', 'inlineStr', None, '-inf')
+    assert rows[3][1] == ('B4', 'inlineStr', None, 'Infinity')
+
+
+@export.test
+def xlsx_column_letters():
+    assert column_letter(0) == 'A'
+    assert column_letter(25) == 'Z'
+    assert column_letter(26) == 'AA'
+    assert column_letter(701) == 'ZZ'
+    assert column_letter(702) == 'AAA'
+
+
+@export.test
+def parallel_shard_ranges():
+    assert shard_ranges(1, 10, 3) == [(1, 5), (5, 9), (9, None)]
+    assert shard_ranges(1, 2, 4) == [(1, 2), (2, None)]
+    assert shard_ranges(5, 5, 2) == [(5, None)]
+
+
+@export.test
+def parallel_export_ordering():
+    records = [{'a': None}, {'a': 2}, {'a': 1}]
+    ordered = lambda ordering, nulls_first: [
+        r['a'] for r in sorted(records, key=lambda r: sort_key(r, ordering, nulls_first))]
+    assert ordered(['a'], True) == [None, 1, 2]
+    assert ordered(['-a'], True) == [2, 1, None]
+    assert ordered(['a'], False) == [1, 2, None]
+    assert ordered(['-a'], False) == [None, 2, 1]
+
+    check_ordering(Person, ['first_name', 'pk'], 'sqlite')
+    check_ordering(Person, ['-occupation', 'pk'], 'postgresql')
+    check_ordering(Person, ['occupation__region', 'pk'], 'mysql')
+    with raises(ValueError):
+        check_ordering(Person, ['first_name', 'pk'], 'postgresql')
+    with raises(ValueError):
+        check_ordering(Person, ['occupation__name', 'pk'], 'mysql')
+    with raises(ValueError):
+        check_ordering(Person, ['count', 'pk'], 'oracle')
+    with raises(ValueError):
+        check_ordering(Person, ['pk'], 'unknown')
+
+
+@export.test
+def parallel_export():
+    with database():
+        names = ['Bradley', 'Chris', 'Davina', 'Ella', 'Fred', 'Gina', 'Chris']
+        for i, name in enumerate(names):
+            Person.objects.create(first_name=name, last_name='%s' % (i % 3))
+        people = Person.objects.all()
+
+        # unordered, in pk order
+        table = PersonTable(people)
+        lines = list(ParallelExport(table, 'csv', processes=1, shards=3))
+        assert b''.join(lines) == b''.join(PersonTable(people.order_by('pk')).as_csv())
+
+        # ordered shards are merged
+        for order_by in ('first_name', '-first_name', ('last_name', '-first_name')):
+            table = PersonTable(people, order_by=order_by)
+            lines = list(ParallelExport(table, 'ndjson', processes=1, shards=3))
+            assert lines == list(table.as_ndjson())
+
+        # the workers use the table's ordering rather than its Meta.order_by
+        table = MetaOrderedPersonTable(people, order_by=('last_name', '-first_name'))
+        lines = list(ParallelExport(table, 'ndjson', processes=1, shards=3))
+        assert lines == list(table.as_ndjson())
+
+        class NameTable(tables.Table):
+            name = tables.Column()
+
+        with raises(ValueError):
+            ParallelExport(NameTable(people, order_by='name'), 'csv')
+
+        # nothing to export
+        table = PersonTable(Person.objects.none())
+        assert list(ParallelExport(table, 'csv', processes=1)) == [
+            b'First Name,Surname\r\n']
+
+        with raises(ValueError):
+            ParallelExport(PersonTable(MEMORY_DATA), 'csv')
+        with raises(ValueError):
+            ParallelExport(table, 'json')
+
+
+class CrashingPersonTable(PersonTable):
+    crash_on = None
+
+    def render_first_name(self, value):
+        if value == CrashingPersonTable.crash_on:
+            raise RuntimeError('crash')
+        return value
+
+
+@export.test
+def export_job_resumes():
+    directory = tempfile.mkdtemp()
+    try:
+        with database():
+            names = ['Bradley', 'Chris', 'Davina', 'Ella', 'Fred']
+            for name in names:
+                Person.objects.create(first_name=name, last_name='x')
+            people = Person.objects.all()
+            expected = b''.join(PersonTable(people.order_by('pk')).as_csv())
+            request = RequestFactory().get('/')
+
+            CrashingPersonTable.crash_on = 'Fred'
+            job = ExportJob(CrashingPersonTable(people, order_by='-first_name'),
+                            directory=directory, checkpoint_every=2)
+            with raises(RuntimeError):
+                job.run()
+            state = job.state
+            assert state['status'] == 'failed'
+            assert state['rows'] == 4
+            assert state['total'] == 5
+            assert state['last_pk'] == Person.objects.get(first_name='Ella').pk
+
+            response = export_job_response(request, job.job_id, directory)
+            assert response.status_code == 500
+            assert json.loads(response.content) == {
+                'id': job.job_id, 'status': 'failed', 'rows': 4, 'total': 5}
+
+            # resume (in a new job instance)
+            CrashingPersonTable.crash_on = None
+            job = ExportJob(CrashingPersonTable(people), job_id=job.job_id,
+                            directory=directory, checkpoint_every=2)
+            job.run()
+            assert job.state['status'] == 'finished'
+            assert job.state['rows'] == 5
+            with open(job.path, 'rb') as f:
+                content = f.read()
+            assert content == expected
+
+            response = export_job_response(request, job.job_id, directory)
+            assert response.status_code == 200
+            assert response['Content-Type'] == 'text/csv'
+            body = b''.join(response)
+            assert body == expected
+
+            # a new job is pending until it's started
+            job = ExportJob(PersonTable(people), 'ndjson', directory=directory)
+            job.save_state({'status': 'pending', 'rows': 0})
+            response = export_job_response(request, job.job_id, directory)
+            assert response.status_code == 202
+
+            with raises(Http404):
+                export_job_response(request, 'a' * 32, directory)
+            with raises(Http404):
+                export_job_response(request, '../etc/passwd', directory)
+    finally:
+        shutil.rmtree(directory)
+
+
+class OrderedCrashingPersonTable(CrashingPersonTable):
+    class Meta:
+        order_by = '-first_name'
+
+
+@export.test
+def export_job_resumes_table_with_meta_order_by():
+    directory = tempfile.mkdtemp()
+    try:
+        with database():
+            for name in ['Bradley', 'Chris', 'Davina', 'Ella', 'Fred']:
+                Person.objects.create(first_name=name, last_name='x')
+            people = Person.objects.all()
+            expected = b''.join(PersonTable(people.order_by('pk')).as_csv())
+
+            CrashingPersonTable.crash_on = 'Davina'
+            job = ExportJob(OrderedCrashingPersonTable(people),
+                            directory=directory, checkpoint_every=2)
+            with raises(RuntimeError):
+                job.run()
+            assert job.state['rows'] == 2
+            CrashingPersonTable.crash_on = None
+            job.run()
+            assert job.state['rows'] == 5
+            with open(job.path, 'rb') as f:
+                content = f.read()
+            assert content == expected
+    finally:
+        shutil.rmtree(directory)
+
+
+@export.test
+def export_job_gzip():
+    directory = tempfile.mkdtemp()
+    try:
+        with database():
+            for name in ['Bradley', 'Chris', 'Davina', 'Ella', 'Fred']:
+                Person.objects.create(first_name=name, last_name='x')
+            people = Person.objects.all()
+            expected = b''.join(PersonTable(people.order_by('pk')).as_csv())
+
+            CrashingPersonTable.crash_on = 'Fred'
+            job = ExportJob(CrashingPersonTable(people), directory=directory,
+                            checkpoint_every=2, gzip=9)
+            with raises(RuntimeError):
+                job.run()
+            CrashingPersonTable.crash_on = None
+            job.run()
+            assert job.path.endswith('.csv.gz')
+            assert job.state['content_type'] == 'application/gzip'
+            with gzip.open(job.path, 'rb') as f:
+                content = f.read()
+            assert content == expected
+    finally:
+        shutil.rmtree(directory)
@@ -1,8 +1,9 @@
 # coding: utf-8
-from attest import assert_hook, Tests  # pylint: disable=W0611
+from attest import assert_hook, raises, Tests  # pylint: disable=W0611
 import itertools
-from django_attest import TestContext
+from django_attest import queries, TestContext
 import django_tables2 as tables
+from django_tables2.utils import cached_property
 from .app.models import Person, Occupation
 
 
@@ -293,3 +294,420 @@ def doesnotexist_from_accessor_should_use_default():
     table = Table(Person.objects.all())
     assert table.rows[0]["first_name"] == "Brad"
     assert table.rows[0]["region"] == "abc"
+
+
+@models.test
+def window_count_paginator():
+    from django.core.paginator import EmptyPage
+
+    for i in range(5):
+        Person.objects.create(first_name="Person %d" % i, last_name="Smith")
+
+    table = PersonTable(Person.objects.all())
+    with queries(count=1):
+        table.paginate(klass=tables.WindowCountPaginator, page=2, per_page=2)
+        assert table.paginator.count == 5
+        assert table.paginator.num_pages == 3
+        assert len(table.rows) == 5
+        assert [row.record.first_name for row in table.page.object_list] \
+            == ["Person 2", "Person 3"]
+
+    # Paginator.count is a cached_property in newer versions of Django
+    class CachedCountPaginator(tables.WindowCountPaginator):
+        @cached_property
+        def count(self):
+            return self.object_list.count()
+
+    paginator = CachedCountPaginator(Person.objects.order_by("pk"), 2)
+    with queries(count=1):
+        page = paginator.page(2)
+        assert paginator.count == 5
+        assert paginator.num_pages == 3
+        assert [person.first_name for person in page.object_list] \
+            == ["Person 2", "Person 3"]
+
+    # orphans are pulled onto the last page
+    table = PersonTable(Person.objects.all())
+    table.paginate(klass=tables.WindowCountPaginator, page=2, per_page=2,
+                   orphans=1)
+    assert len(table.page.object_list) == 3
+    assert table.paginator.num_pages == 2
+
+    # an empty page falls back to count()
+    table = PersonTable(Person.objects.all())
+    with queries(count=2):
+        with raises(EmptyPage):
+            table.paginate(klass=tables.WindowCountPaginator, page=10)
+
+    # aggregates and values() fall back to count()
+    from django.db.models import Count
+    occupation = Occupation.objects.create(name="Programmer")
+    Person.objects.update(occupation=occupation)
+
+    class OccupationTable(tables.Table):
+        name = tables.Column()
+        population = tables.ExpressionColumn(Count('people'))
+
+    table = OccupationTable(Occupation.objects.all())
+    with queries(count=2):
+        table.paginate(klass=tables.WindowCountPaginator, per_page=2)
+        assert [row['population'] for row in table.page.object_list] == [5]
+
+    paginator = tables.WindowCountPaginator(
+            Occupation.objects.annotate(n=Count('people')), 2)
+    assert [o.n for o in paginator.page(1).object_list] == [5]
+
+    paginator = tables.WindowCountPaginator(
+            Person.objects.values('first_name').order_by('pk'), 2)
+    with queries(count=2):
+        page = paginator.page(3)
+        assert [p['first_name'] for p in page.object_list] == ["Person 4"]
+        assert paginator.count == 5
+
+
+@models.test
+def unevaluated_queryset_is_iterated_without_caching():
+    for i in range(3):
+        Person.objects.create(first_name="Person %d" % i, last_name="Smith")
+
+    table = PersonTable(Person.objects.all())
+    with table.data.chunked():
+        assert [row["first_name"] for row in table.rows] \
+            == ["Person 0", "Person 1", "Person 2"]
+    assert table.data.queryset._result_cache is None
+
+    # rendering a table that isn't paginated
+    table = PersonTable(Person.objects.all())
+    table.as_html()
+    assert table.data.queryset._result_cache is None
+
+    # otherwise the records are cached, so the rows can be iterated again
+    table = PersonTable(Person.objects.all())
+    list(table.rows)
+    with queries(count=0):
+        assert len(list(table.rows)) == 3
+
+    # iterator() would ignore prefetch_related()
+    table = PersonTable(Person.objects.prefetch_related("occupation"))
+    with table.data.chunked():
+        list(table.rows)
+    assert len(table.data.queryset._result_cache) == 3
+
+    # an evaluated queryset uses its cache
+    queryset = Person.objects.all()
+    list(queryset)
+    with queries(count=0):
+        table = PersonTable(queryset)
+        with table.data.chunked():
+            assert len(list(table.rows)) == 3
+
+    class CachingPersonTable(PersonTable):
+        class Meta:
+            iterator_chunk_size = None
+
+    table = CachingPersonTable(Person.objects.all())
+    with table.data.chunked():
+        list(table.rows)
+    assert len(table.data.queryset._result_cache) == 3
+
+
+@models.test
+def expression_columns_are_computed_and_ordered_by_the_database():
+    from django.db.models import Count
+
+    class OccupationTable(tables.Table):
+        name = tables.Column()
+        population = tables.ExpressionColumn(Count('people'))
+        code = tables.ExpressionColumn("UPPER(name) || %s", params=['!'])
+
+        def render_population(self, value):
+            return '%d people' % value
+
+    for name, count in (('Programmer', 2), ('Carpenter', 3), ('Doctor', 1)):
+        occupation = Occupation.objects.create(name=name)
+        for i in range(count):
+            Person.objects.create(first_name=name, last_name=str(i),
+                                  occupation=occupation)
+
+    table = OccupationTable(Occupation.objects.all(), order_by='-population')
+    with queries(count=1):
+        cells = [list(row) for row in table.rows]
+    assert cells == [['Carpenter', '3 people', 'CARPENTER!'],
+                     ['Programmer', '2 people', 'PROGRAMMER!'],
+                     ['Doctor', '1 people', 'DOCTOR!']]
+    table.order_by = 'code'
+    assert [row['name'] for row in table.rows] == ['Carpenter', 'Doctor', 'Programmer']
+
+    # a table of the table's (already annotated) queryset
+    table = OccupationTable(table.data.queryset, order_by='population')
+    assert [row['population'] for row in table.rows] == ['1 people', '2 people', '3 people']
+
+    # other data shows the default
+    table = OccupationTable([{'name': 'Pilot'}])
+    assert table.rows[0]['population'] == u'—'
+
+
+@models.test
+def ordering_by_properties_falls_back_to_python():
+    class PersonTable(tables.Table):
+        name = tables.Column()
+        occupation = tables.Column(accessor='occupation.name')
+
+    programmer = Occupation.objects.create(name='Programmer')
+    carpenter = Occupation.objects.create(name='Carpenter')
+    for first_name, last_name, occupation in (('Chris', 'Doble', programmer),
+                                              ('Bradley', 'Ayers', programmer),
+                                              ('Davina', 'Smith', carpenter),
+                                              ('Adam', 'Jones', programmer)):
+        Person.objects.create(first_name=first_name, last_name=last_name,
+                              occupation=occupation)
+
+    table = PersonTable(Person.objects.all(), order_by='-name')
+    assert [row['name'] for row in table.rows] == [
+        'Davina Smith', 'Chris Doble', 'Bradley Ayers', 'Adam Jones']
+
+    # the database orders by the leading fields
+    table = PersonTable(Person.objects.all(), order_by=('occupation', 'name'))
+    assert table.data.queryset.query.order_by == ['occupation__name', 'pk']
+    table.paginate(page=2, per_page=2)
+    assert [row['name'] for row in table.page.object_list] == [
+        'Bradley Ayers', 'Chris Doble']
+
+    # too many rows to sort in Python, only the database ordering is used
+    class LimitedPersonTable(PersonTable):
+        class Meta:
+            python_ordering_limit = 3
+
+    table = LimitedPersonTable(Person.objects.all(), order_by=('-occupation', 'name'))
+    assert table.data.queryset.query.order_by == ['-occupation__name', '-pk']
+    assert [row['occupation'] for row in table.rows] == [
+        'Programmer', 'Programmer', 'Programmer', 'Carpenter']
+    # so the table isn't marked as ordered by the other columns
+    assert table.order_by == ('-occupation', )
+    assert table.columns['occupation'].is_ordered
+    assert not table.columns['name'].is_ordered
+
+    table = LimitedPersonTable(Person.objects.all(), order_by=('name', 'occupation'))
+    assert table.order_by == ()
+
+
+@models.test
+def ordering_is_made_unique_by_the_primary_key():
+    class PersonTable(tables.Table):
+        id = tables.Column()
+        first_name = tables.Column()
+        last_name = tables.Column()
+
+    for last_name in ('Smith', 'Jones', 'Smith', 'Jones', 'Smith'):
+        Person.objects.create(first_name='Chris', last_name=last_name)
+    ids = list(Person.objects.values_list('pk', flat=True))
+
+    table = PersonTable(Person.objects.all(), order_by='-first_name')
+    assert table.data.queryset.query.order_by == ['-first_name', '-pk']
+    pages = []
+    for page in (1, 2, 3):
+        table.paginate(page=page, per_page=2)
+        pages += [row.record.pk for row in table.page.object_list]
+    assert pages == sorted(ids, reverse=True)
+
+    table = PersonTable(Person.objects.all(), order_by=('last_name', '-first_name'))
+    assert table.data.queryset.query.order_by == ['last_name', '-first_name', '-pk']
+
+    # already unique
+    table = PersonTable(Person.objects.all(), order_by=('last_name', 'id'))
+    assert table.data.queryset.query.order_by == ['last_name', 'id']
+    table = PersonTable(Person.objects.all(), order_by=('-id', 'last_name'))
+    assert table.data.queryset.query.order_by == ['-id', 'last_name']
+
+
+@models.test
+def primary_key_doesnt_break_ties_of_grouped_or_distinct_querysets():
+    from django.db.models import Count
+
+    class NameTable(tables.Table):
+        last_name = tables.Column()
+
+    class CountTable(tables.Table):
+        last_name = tables.Column()
+        count = tables.Column()
+
+    for last_name in ('a', 'b', 'a'):
+        Person.objects.create(first_name='Chris', last_name=last_name)
+
+    # distinct values
+    table = NameTable(Person.objects.values('last_name').distinct(), order_by='last_name')
+    assert [row['last_name'] for row in table.rows] == ['a', 'b']
+
+    # values grouped by values().annotate()
+    queryset = Person.objects.values('last_name').annotate(count=Count('id'))
+    table = CountTable(queryset, order_by='last_name')
+    assert [(row['last_name'], row['count']) for row in table.rows] == [('a', 2), ('b', 1)]
+
+    # plain values
+    table = NameTable(Person.objects.values('last_name'), order_by='last_name')
+    assert table.data.queryset.query.order_by == ['last_name']
+
+    # distinct rows
+    table = NameTable(Person.objects.distinct(), order_by='last_name')
+    assert table.data.queryset.query.order_by == ['last_name']
+
+    # aggregates
+    table = NameTable(Person.objects.annotate(count=Count('id')), order_by='last_name')
+    assert table.data.queryset.query.order_by == ['last_name']
+
+
+@models.test
+def footer_aggregates_are_fetched_with_the_count():
+    from django.db.models import Count
+
+    class OccupationTable(tables.Table):
+        name = tables.Column(footer='count')
+        population = tables.ExpressionColumn(Count('people'), footer='sum')
+        last = tables.Column(accessor='name', footer='max')
+
+    for name, count in (('Programmer', 2), ('Carpenter', 3), ('Doctor', 0)):
+        occupation = Occupation.objects.create(name=name)
+        for i in range(count):
+            Person.objects.create(first_name=name, last_name=str(i),
+                                  occupation=occupation)
+
+    table = OccupationTable(Occupation.objects.all())
+    with queries(count=1):
+        table.paginate(per_page=2)
+        footer = [column.footer for column in table.columns]
+    assert footer == [3, 5, 'Programmer']
+    assert len(table.data) == 3
+    html = table.as_html()
+    assert ('<tfoot><tr><td class="name">3</td><td class="population">5</td>'
+            '<td class="last">Programmer</td></tr></tfoot>') in html
+    assert '<tfoot></tfoot>' in PersonTable(Person.objects.all()).as_html()
+
+    # an empty queryset
+    table = OccupationTable(Occupation.objects.none())
+    assert len(table.rows) == 0
+    assert table.data.footer == {'name': None, 'population': None, 'last': None}
+    assert '<tfoot><tr><td class="name">' in table.as_html()
+
+
+@models.test
+def grouped_rows_get_their_subtotals_from_the_database():
+    class GroupedTable(tables.Table):
+        occupation = tables.Column()
+        first_name = tables.Column(footer='max')
+        last_name = tables.Column(footer='count')
+
+        class Meta:
+            group_by = 'occupation'
+
+    for name, count in (('Programmer', 2), ('Carpenter', 3)):
+        occupation = Occupation.objects.create(name=name)
+        for i in range(count):
+            Person.objects.create(first_name='%s %s' % (name, i), last_name=str(i),
+                                  occupation=occupation)
+    Person.objects.create(first_name='Idle', last_name='0')
+
+    table = GroupedTable(Person.objects.select_related('occupation')
+                                       .order_by('-last_name'))
+    table.paginate(per_page=4)
+    with queries(count=2):
+        # the page's rows, and the groups they start
+        rows = list(table.page.object_list)
+    groups = [(unicode(row.group.value), row.group.count, row.group.subtotals)
+              for row in rows if row.group is not None]
+    assert groups == [(u'—', 1, {'first_name': 'Idle', 'last_name': 1}),
+                      ('Programmer', 2, {'first_name': 'Programmer 1', 'last_name': 2}),
+                      ('Carpenter', 3, {'first_name': 'Carpenter 2', 'last_name': 3})]
+    # the rows are ordered within their groups
+    assert [row['last_name'] for row in rows] == ['0', '1', '0', '2']
+
+    table.paginate(page=2, per_page=4)
+    rows = list(table.page.object_list)
+    assert rows[0].group.count == 3
+    assert [row['last_name'] for row in rows] == ['1', '0']
+
+    html = table.as_html()
+    assert ('<tr class="group" data-count="3">&#32;'
+            '<td class="occupation">Carpenter</td>&#32;'
+            '<td class="first_name">Carpenter 2</td>&#32;'
+            '<td class="last_name">3</td>&#32;</tr>&#32;'
+            '<tr class="odd">') in html
+
+
+@models.test
+def table_indexes_command_reports_unindexed_ordering_fields():
+    from django.core.management import call_command
+    from StringIO import StringIO
+
+    # (before any rows are created, sqlite commits before running EXPLAIN)
+    out = StringIO()
+    call_command('table_indexes', 'tests.app.tables', explain=True, stdout=out)
+    lines = out.getvalue().splitlines()
+    assert lines[0].startswith('tests.app.tables.PersonTable.name: ')
+    assert lines[1].startswith('    ')
+
+    Person.objects.create(first_name='Bradley', last_name='Ayers')
+    Person.objects.create(first_name='Chris', last_name='Doble')
+
+    # tests.app.tables is found via INSTALLED_APPS
+    out = StringIO()
+    call_command('table_indexes', stdout=out)
+    assert out.getvalue().splitlines() == [
+        'tests.app.tables.PersonTable.name: app_person.last_name has no index (~2 rows)',
+        'tests.app.tables.PersonTable.name: app_person.first_name has no index (~2 rows)',
+        'tests.app.tables.PersonTable.occupation_name: app_occupation.name has no index (~0 rows)',
+        'tests.app.tables.PersonTable.mayor_of: app_region.name has no index (~0 rows)',
+    ]
+
+    out = StringIO()
+    call_command('table_indexes', 'django_tables2.tables', stdout=out)
+    assert out.getvalue() == "Every orderable column's fields have an index.\n"
+
+
+@models.test
+def query_stats_find_queries_executed_per_row():
+    from django_tables2.queries import assert_query_budget, QueryBudgetWarning
+    from django_attest import settings
+    import warnings
+
+    class OccupationTable(tables.Table):
+        first_name = tables.Column()
+        occupation = tables.Column(accessor='occupation.name')
+
+        class Meta:
+            query_budget = 2
+
+    for name in ('Programmer', 'Carpenter', 'Doctor'):
+        Person.objects.create(first_name=name, last_name='Smith',
+                              occupation=Occupation.objects.create(name=name))
+
+    table = OccupationTable(Person.objects.all())
+    with raises(AssertionError):
+        assert_query_budget(table)
+    stats = table.query_stats
+    assert len(stats) == 5
+    assert stats.repeated() == [
+        ('SELECT "app_occupation"."id", "app_occupation"."name", '
+         '"app_occupation"."region_id" FROM "app_occupation" '
+         'WHERE "app_occupation"."id" = ?', 3)]
+
+    stats = assert_query_budget(OccupationTable(Person.objects.select_related('occupation')))
+    assert len(stats) == 2
+    assert stats.repeated() == []
+    assert_query_budget(PersonTable(Person.objects.select_related('occupation')), 2)
+    with raises(ValueError):
+        assert_query_budget(PersonTable(Person.objects.all()))
+
+    # rendering records the queries if there's a budget, and warns in debug mode
+    table = OccupationTable(Person.objects.all())
+    table.as_html()
+    assert len(table.query_stats) == 5
+    with settings(DEBUG=True):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            OccupationTable(Person.objects.all()).as_html()
+            OccupationTable(Person.objects.select_related('occupation')).as_html()
+    assert [w.category for w in caught] == [QueryBudgetWarning]
+    assert 'OccupationTable exceeded its budget of 2 queries' in str(caught[0].message)
+    table = PersonTable(Person.objects.all())
+    table.as_html()
+    assert table.query_stats is None
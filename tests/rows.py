@@ -53,3 +53,103 @@ def bound_row():
 
     with raises(KeyError):
         row['gamma']
+
+
+@rows.test
+def columns_can_be_loaded_in_batches():
+    calls = []
+
+    class LengthColumn(tables.Column):
+        def load(self, records):
+            return dict((r['pk'], len(r['name'])) for r in records if r['name'] != 'Peter')
+
+    class SimpleTable(tables.Table):
+        name = tables.Column()
+        length = LengthColumn(default='?')
+        upper = tables.Column()
+
+        def load_upper(self, records):
+            calls.append([record['pk'] for record in records])
+            return dict((record['pk'], record['name'].upper()) for record in records)
+
+        def render_upper(self, value):
+            return '<%s>' % value
+
+    data = [{'pk': 1, 'name': 'Bradley'},
+            {'pk': 2, 'name': 'Chris'},
+            {'pk': 3, 'name': 'Peter'}]
+    table = SimpleTable(data)
+    table.paginate(per_page=2)
+    cells = [list(row) for row in table.page.object_list]
+    assert cells == [['Bradley', 7, '<BRADLEY>'], ['Chris', 5, '<CHRIS>']]
+    # once per page
+    assert calls == [[1, 2]]
+
+    # a row that's accessed on its own is loaded by itself
+    assert table.rows[2]['upper'] == '<PETER>'
+    assert table.rows[2].get_cell_value('upper') == 'PETER'
+    # records missing from the loaded values get the default
+    assert table.rows[2]['length'] == '?'
+
+    del calls[:]
+    cells = [list(row) for row in table.rows]
+    assert len(cells) == 3
+    assert calls == [[1, 2, 3]]
+
+
+@rows.test
+def only_visible_columns_are_loaded_in_batches():
+    calls = []
+
+    class SimpleTable(tables.Table):
+        name = tables.Column()
+        upper = tables.Column(visible=False)
+
+        def load_upper(self, records):
+            calls.append([record['pk'] for record in records])
+            return dict((record['pk'], record['name'].upper()) for record in records)
+
+    table = SimpleTable([{'pk': 1, 'name': 'Bradley'}, {'pk': 2, 'name': 'Chris'}])
+    cells = [list(row) for row in table.rows]
+    assert cells == [['Bradley'], ['Chris']]
+    assert calls == []
+
+    # a hidden column is loaded when it's used
+    upper = table.rows[1]['upper']
+    assert upper == 'CHRIS'
+    assert calls == [[2]]
+
+
+@rows.test
+def loaded_columns_need_a_primary_key():
+    class SimpleTable(tables.Table):
+        name = tables.Column()
+        upper = tables.Column()
+
+        def load_upper(self, records):
+            return {None: 'same for every row'}
+
+    table = SimpleTable([{'name': 'Bradley'}, {'name': 'Chris'}])
+    with raises(ValueError):
+        list(table.rows)
+
+
+@rows.test
+def page_is_loaded_once_when_rendered():
+    calls = []
+
+    class SimpleTable(tables.Table):
+        name = tables.Column()
+        upper = tables.Column()
+
+        def load_upper(self, records):
+            calls.append([record['pk'] for record in records])
+            return dict((record['pk'], record['name'].upper()) for record in records)
+
+    data = [{'pk': i, 'name': name}
+            for i, name in enumerate(['Bradley', 'Chris', 'Davina', 'Ella'], 1)]
+    table = SimpleTable(data)
+    table.paginate(per_page=3)
+    html = table.as_html()
+    assert 'DAVINA' in html
+    assert calls == [[1, 2, 3]]
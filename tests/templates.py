@@ -181,6 +181,13 @@ def render_table_supports_queryset():
             db.append([unicode(region.id), region.name, u"—"])
         assert td == db
 
+        # the generated table class is reused
+        from django_tables2.templatetags.django_tables2 import on_the_fly_table
+        table_class = on_the_fly_table(Region)
+        assert template.render(Context({'qs': Region.objects.all()})) == html
+        assert on_the_fly_table(Region) is table_class
+        assert on_the_fly_table(Person) is not table_class
+
 
 @templates.test
 def querystring_templatetag():
@@ -297,3 +304,240 @@ def render_table_db_queries():
             table = PersonTable(Person.objects.all())
             RequestConfig(request).configure(table)
             render(table=table, request=request)
+
+
+@templates.test
+def streaming_renderer_matches_template():
+    render = lambda table, request: (
+        Template('{% load django_tables2 %}{% render_table table %}')
+        .render(Context({'request': request, 'table': table})))
+
+    class SafeTable(CountryTable):
+        flag = tables.Column(verbose_name=mark_safe('<i>flag</i>'),
+                             attrs={'td': {'data-x': '<&>'}})
+
+        class Meta:
+            attrs = {'class': 'paleblue'}
+
+    data = MEMORY_DATA + [{'name': 'Atlantis', 'flag': mark_safe('<b>a</b> <i>b</i>')},
+                          {'name': mark_safe(' <b>c</b> ')}]
+
+    request = build_request('/?sort=-name&extra=a%26b')
+    table = SafeTable(data)
+    RequestConfig(request, paginate=False).configure(table)
+    expected = render(table, request)
+    chunks = list(tables.StreamingRenderer(table, request, chunk_size=2))
+    assert len(chunks) == 5
+    assert chunks[0].endswith('<tbody>&#32;')
+    assert ''.join(chunks) == expected
+
+    # paginated, on a page in the middle
+    request = build_request('/?page=2')
+    table = SafeTable(data)
+    RequestConfig(request, paginate={'per_page': 2}).configure(table)
+    assert ''.join(tables.StreamingRenderer(table, request)) == render(table, request)
+
+    # empty, with and without empty_text
+    for empty_text in (None, 'nothing <here>'):
+        request = build_request('/')
+        table = CountryTable([], empty_text=empty_text)
+        RequestConfig(request).configure(table)
+        assert ''.join(tables.StreamingRenderer(table, request)) == render(table, request)
+
+
+@templates.test
+def native_rendering_matches_template():
+    class NativeTable(CountryTable):
+        population = tables.Column(verbose_name='population size', footer='avg')
+        flag = tables.Column(verbose_name=mark_safe('<i>flag</i>'),
+                             attrs={'td': {'data-x': '<&>'}}, footer='count')
+        link = tables.TemplateColumn('<a href="{{ request.path }}">{{ record.name }}</a>')
+
+        class Meta:
+            attrs = {'class': 'paleblue'}
+            native_rendering = True
+
+    class TemplateTable(NativeTable):
+        class Meta(NativeTable.Meta):
+            native_rendering = False
+
+    data = MEMORY_DATA + [{'name': 'Atlantis', 'flag': mark_safe('<b>a</b> <i>b</i>')},
+                          {'name': mark_safe(' <b>c</b> ')}]
+    template = Template('{% load django_tables2 %}{% render_table table %}')
+
+    def render(table_class, request=None, data=data, **kwargs):
+        table = table_class(data, **kwargs)
+        if request is None:
+            return table.as_html()
+        RequestConfig(request, paginate={'per_page': 2}).configure(table)
+        return template.render(Context({'request': request, 'table': table}))
+
+    assert render(NativeTable) == render(TemplateTable)
+    for url in ('/?sort=-name&extra=a%26b', '/?page=2', '/?page=3'):
+        request = build_request(url)
+        assert render(NativeTable, request) == render(TemplateTable, request)
+    for empty_text in (None, 'nothing <here>'):
+        assert (NativeTable([], empty_text=empty_text).as_html()
+                == TemplateTable([], empty_text=empty_text).as_html())
+
+    # grouped rows
+    grouped = [dict(record, currency=record.get('currency', '')) for record in data]
+
+    class GroupedNativeTable(NativeTable):
+        currency = tables.Column()
+
+        class Meta(NativeTable.Meta):
+            group_by = 'currency'
+
+    class GroupedTemplateTable(GroupedNativeTable):
+        class Meta(GroupedNativeTable.Meta):
+            native_rendering = False
+
+    html = render(GroupedNativeTable, data=grouped)
+    assert html.count('<tr class="group" data-count="3">') == 2
+    assert html == render(GroupedTemplateTable, data=grouped)
+    request = build_request('/?page=2')
+    assert (render(GroupedNativeTable, request, data=grouped)
+            == render(GroupedTemplateTable, request, data=grouped))
+
+    # a column called "group" doesn't shadow the group header
+    class GroupColumnNativeTable(NativeTable):
+        group = tables.Column(accessor='currency')
+
+        class Meta(NativeTable.Meta):
+            pass
+
+    class GroupColumnTemplateTable(GroupColumnNativeTable):
+        class Meta(NativeTable.Meta):
+            native_rendering = False
+
+    html = render(GroupColumnTemplateTable, data=grouped)
+    assert '<tr class="group"' not in html
+    assert html == render(GroupColumnNativeTable, data=grouped)
+
+    class GroupedByGroupNativeTable(GroupColumnNativeTable):
+        class Meta(NativeTable.Meta):
+            group_by = 'group'
+
+    class GroupedByGroupTemplateTable(GroupedByGroupNativeTable):
+        class Meta(GroupedByGroupNativeTable.Meta):
+            native_rendering = False
+
+    html = render(GroupedByGroupTemplateTable, data=grouped)
+    assert html.count('<tr class="group" data-count="3">') == 2
+    assert html == render(GroupedByGroupNativeTable, data=grouped)
+
+    # a different template is rendered as usual
+    assert render(NativeTable, template='dummy.html') == 'dummy template contents\n'
+
+
+@templates.test
+def compact_template_matches_default():
+    class DefaultTable(CountryTable):
+        population = tables.Column(verbose_name='population size', footer='avg')
+        flag = tables.Column(verbose_name=mark_safe(' <i>flag</i>  <b>!</b>'),
+                             attrs={'td': {'data-x': '<&>'}}, footer='count')
+        link = tables.TemplateColumn('<a href="{{ request.path }}">{{ record.name }}</a>\n')
+
+        class Meta:
+            attrs = {'class': 'paleblue'}
+
+    class CompactTable(DefaultTable):
+        class Meta(DefaultTable.Meta):
+            template = 'django_tables2/table_compact.html'
+
+    data = MEMORY_DATA + [{'name': 'Atlantis', 'flag': mark_safe('<b>a</b> <i>b</i>')},
+                          {'name': mark_safe(' <b>c</b> '), 'flag': '  '},
+                          {'name': '<d> <e>', 'flag': mark_safe('\n')}]
+    template = Template('{% load django_tables2 %}{% render_table table %}')
+
+    def render(table_class, request=None, data=data, **kwargs):
+        table = table_class(data, **kwargs)
+        if request is None:
+            return table.as_html()
+        RequestConfig(request, paginate={'per_page': 2}).configure(table)
+        return template.render(Context({'request': request, 'table': table}))
+
+    assert render(CompactTable) == render(DefaultTable)
+    for url in ('/?sort=-name&extra=a%26b', '/?page=2', '/?page=3', '/?page=4'):
+        request = build_request(url)
+        assert render(CompactTable, request) == render(DefaultTable, request)
+    for empty_text in (None, 'nothing <here>', mark_safe('<b>no</b> <i>rows</i>')):
+        assert (CompactTable([], empty_text=empty_text).as_html()
+                == DefaultTable([], empty_text=empty_text).as_html())
+
+    # grouped rows
+    grouped = [dict(record, currency=record.get('currency', '')) for record in data]
+
+    class GroupedTable(DefaultTable):
+        currency = tables.Column()
+
+        class Meta(DefaultTable.Meta):
+            group_by = 'currency'
+
+    class GroupedCompactTable(GroupedTable):
+        class Meta(GroupedTable.Meta):
+            template = 'django_tables2/table_compact.html'
+
+    assert render(GroupedCompactTable, data=grouped) == render(GroupedTable, data=grouped)
+
+    class GroupColumnTable(DefaultTable):
+        group = tables.Column(accessor='currency')
+
+        class Meta(DefaultTable.Meta):
+            pass
+
+    class GroupColumnCompactTable(GroupColumnTable):
+        class Meta(DefaultTable.Meta):
+            template = 'django_tables2/table_compact.html'
+
+    html = render(GroupColumnCompactTable, data=grouped)
+    assert '<tr class="group"' not in html
+    assert html == render(GroupColumnTable, data=grouped)
+
+
+@templates.test
+def compact_tag():
+    template = Template('{% load django_tables2 %}{% compact %}\n<ul>\n  {% for x in xs %}\n'
+                        '    <li>{{ x }} !</li>&#32;\n  {% endfor %}\n</ul>\n{% endcompact %}\n')
+    html = template.render(Context({'xs': ['a', 'b']}))
+    assert html == '<ul><li>a !</li>&#32;<li>b !</li>&#32;</ul>\n'
+
+    template = Template('{% load django_tables2 %}{% filter between_tags %}{{ x }}{% endfilter %}')
+    html = template.render(Context({'x': mark_safe(' <b>a</b>  <b>b</b>\n')}))
+    assert html == '&#32;<b>a</b>&#32;<b>b</b>&#32;'
+    html = template.render(Context({'x': 'a  b <c>'}))
+    assert html == 'a  b &lt;c&gt;'
+
+
+@templates.test
+def native_template_detection():
+    from django.test.utils import override_settings
+    from django_tables2 import renderers
+    import os
+    import shutil
+    import tempfile
+
+    assert renderers.is_native_template('django_tables2/table.html')
+    assert renderers.is_native_template('django_tables2/table_compact.html')
+    assert not renderers.is_native_template('dummy.html')
+
+    # the default template is overridden by a project's template
+    directory = tempfile.mkdtemp()
+    try:
+        os.mkdir(os.path.join(directory, 'django_tables2'))
+        with open(os.path.join(directory, 'django_tables2', 'table.html'), 'w') as f:
+            f.write('custom')
+        renderers._native_template.clear()
+        with override_settings(TEMPLATE_DIRS=[directory]):
+            assert not renderers.is_native_template('django_tables2/table.html')
+    finally:
+        shutil.rmtree(directory)
+        renderers._native_template.clear()
+
+
+@templates.test
+def streaming_renderer_custom_template():
+    table = CountryTable(MEMORY_DATA, template='dummy.html')
+    chunks = list(tables.StreamingRenderer(table))
+    assert chunks == [table.as_html()]
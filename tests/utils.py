@@ -1,7 +1,8 @@
 # coding: utf-8
 from attest import assert_hook, raises, Tests
-from django_tables2.utils import (Accessor, AttributeDict, OrderByTuple,
-                                  OrderBy, segment)
+from django_tables2.utils import (Accessor, AttributeDict, gzip_chunks,
+                                  OrderByTuple, OrderBy, segment)
+import zlib
 
 
 utils = Tests()
@@ -106,3 +107,24 @@ def segment_should_return_all_candidates():
             ["x", "-y"],
             ["x", "z"],
         ]
+
+
+@utils.test
+def gzip_chunks_compresses_incrementally():
+    def decompress(data):
+        return zlib.decompress(data, 16 + zlib.MAX_WBITS)
+
+    lines = [('line %d\n' % i).encode('ascii') for i in range(1000)]
+    expected = b''.join(lines)
+    chunks = list(gzip_chunks(lines, flush_size=1000))
+    assert len(chunks) > 5
+    assert decompress(b''.join(chunks)) == expected
+    # each flushed chunk can be decompressed as soon as it arrives
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    first = decompressor.decompress(chunks[0])
+    assert first.startswith(b'line 0\n')
+
+    chunks = list(gzip_chunks(lines, level=9, flush_size=None))
+    assert len(chunks) == 1
+    assert decompress(chunks[0]) == expected
+    assert decompress(b''.join(gzip_chunks([u'\xe9']))) == u'\xe9'.encode('utf-8')
@@ -1,9 +1,11 @@
 # coding: utf-8
 from .app.models import Region
 from attest import assert_hook, Tests
-from django_attest import TestContext
+from django_attest import queries, TestContext
 import django_tables2 as tables
 from django_tables2.utils import build_request
+import json
+import zlib
 
 
 views = Tests()
@@ -54,3 +56,234 @@ def should_support_explicit_table_data():
     request = build_request('/')
     response, view = SimpleView.as_view()(request)
     assert view.get_table().paginator.num_pages == 3
+
+
+@views.test_if(USING_CBV)
+def should_support_streaming():
+    for name in ("Queensland", "New South Wales", "Victoria"):
+        Region.objects.create(name=name)
+
+    class SimpleView(tables.SingleTableView):
+        table_class = SimpleTable
+        table_pagination = False
+        table_streaming = {"chunk_size": 1}
+        model = Region  # needed for ListView
+
+    request = build_request('/')
+    response = SimpleView.as_view()(request)
+    chunks = list(response)
+    assert len(chunks) == 5
+    table = SimpleTable(Region.objects.all())
+    assert ''.join(chunks) == table.as_html().encode('utf-8')
+
+
+@views.test_if(USING_CBV)
+def should_support_export_via_querystring():
+    for name in ("Queensland", "New South Wales", "Victoria"):
+        Region.objects.create(name=name)
+
+    class SimpleView(tables.SingleTableView):
+        table_class = SimpleTable
+        table_pagination = {"per_page": 1}
+        table_export_formats = ("csv", )
+        model = Region  # needed for ListView
+
+    response = SimpleView.as_view()(build_request('/?export=csv&sort=name'))
+    assert response["Content-Type"] == "text/csv"
+    assert response["Content-Disposition"] == 'attachment; filename="regions.csv"'
+    lines = list(response)
+    assert len(lines) == 4
+    assert lines[1].startswith(b"2,New South Wales,")
+
+    # formats that aren't enabled are ignored
+    response = SimpleView.as_view()(build_request('/?export=json'))
+    assert response["Content-Type"].startswith("text/html")
+
+
+@views.test_if(USING_CBV)
+def should_build_the_table_once():
+    Region.objects.create(name="Queensland")
+    built = []
+
+    class SimpleView(tables.SingleTableView):
+        table_class = SimpleTable
+        table_export_formats = ("csv", )
+        model = Region  # needed for ListView
+
+        def get_table(self, **kwargs):
+            table = super(SimpleView, self).get_table(**kwargs)
+            built.append(table)
+            return table
+
+    for url, streaming in (('/?export=csv', False), ('/', True)):
+        del built[:]
+        SimpleView.table_streaming = streaming
+        b"".join(SimpleView.as_view()(build_request(url)))
+        assert len(built) == 1
+
+
+@views.test_if(USING_CBV)
+def should_support_gzip():
+    for name in ("Queensland", "New South Wales", "Victoria"):
+        Region.objects.create(name=name)
+
+    class SimpleView(tables.SingleTableView):
+        table_class = SimpleTable
+        table_export_formats = ("csv", )
+        table_gzip = {"level": 1, "flush_size": 1}
+        model = Region  # needed for ListView
+
+    request = build_request('/?export=csv')
+    response = SimpleView.as_view()(request)
+    assert not response.has_header("Content-Encoding")
+    assert response["Vary"] == "Accept-Encoding, Accept"
+    expected = b"".join(response)
+
+    request = build_request('/?export=csv')
+    request.META["HTTP_ACCEPT_ENCODING"] = "gzip, deflate"
+    response = SimpleView.as_view()(request)
+    assert response["Content-Encoding"] == "gzip"
+    chunks = list(response)
+    assert len(chunks) == 5
+    body = zlib.decompress(b"".join(chunks), 16 + zlib.MAX_WBITS)
+    assert body == expected
+
+    SimpleView.table_streaming = True
+    request = build_request('/')
+    request.META["HTTP_ACCEPT_ENCODING"] = "gzip"
+    response = SimpleView.as_view()(request)
+    assert response["Content-Encoding"] == "gzip"
+    body = zlib.decompress(b"".join(response), 16 + zlib.MAX_WBITS)
+    assert body.startswith(b'<div class="table-container">')
+
+
+@views.test_if(USING_CBV)
+def should_support_conditional_get():
+    for name in ("Queensland", "New South Wales"):
+        Region.objects.create(name=name)
+
+    class SimpleView(tables.SingleTableView):
+        table_class = SimpleTable
+        table_version_field = "id"
+        model = Region  # needed for ListView
+
+    response = SimpleView.as_view()(build_request('/'))
+    assert response.status_code == 200
+    etag = response["ETag"]
+    assert not response.has_header("Last-Modified")  # not a date
+
+    request = build_request('/')
+    request.META["HTTP_IF_NONE_MATCH"] = etag
+    with queries(count=1):
+        response = SimpleView.as_view()(request)
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+
+    # an export of the table is a different representation
+    request = build_request('/?export=csv')
+    request.META["HTTP_IF_NONE_MATCH"] = etag
+    SimpleView.table_export_formats = ("csv", )
+    assert SimpleView.as_view()(request).status_code == 200
+
+    Region.objects.create(name="Victoria")
+    request = build_request('/')
+    request.META["HTTP_IF_NONE_MATCH"] = etag
+    response = SimpleView.as_view()(request)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+    # If-Modified-Since
+    view = SimpleView()
+    view.request = build_request('/')
+    view.request.META["HTTP_IF_MODIFIED_SINCE"] = "Sat, 01 Dec 2012 10:00:00 GMT"
+    assert view.table_not_modified("x", 1354356000)
+    assert not view.table_not_modified("x", 1354356001)
+    assert not view.table_not_modified("x", None)
+
+
+@views.test_if(USING_CBV)
+def should_negotiate_json_export():
+    for name in ("Queensland", "New South Wales", "Victoria"):
+        Region.objects.create(name=name)
+
+    class SimpleView(tables.SingleTableView):
+        table_class = SimpleTable
+        table_pagination = {"per_page": 2}
+        table_export_formats = ("json", "ndjson")
+        model = Region  # needed for ListView
+
+    request = build_request('/?page=2')
+    request.META["HTTP_ACCEPT"] = "application/json, text/javascript, */*; q=0.01"
+    response = SimpleView.as_view()(request)
+    assert response["Content-Type"] == "application/json"
+    assert response["Vary"] == "Accept"
+    assert not response.has_header("Content-Disposition")
+    data = json.loads(b"".join(response))
+    assert data["page"] == 2
+    assert data["total"] == 3
+    assert [row["name"] for row in data["rows"]] == ["Victoria"]
+
+    # bulk exports aren't paginated
+    response = SimpleView.as_view()(build_request('/?export=ndjson'))
+    assert response["Content-Disposition"] == 'attachment; filename="regions.ndjson"'
+    assert len(list(response)) == 3
+
+    # browsers get HTML
+    request = build_request('/')
+    request.META["HTTP_ACCEPT"] = "text/html,application/xhtml+xml,application/json;q=0.9,*/*;q=0.8"
+    response = SimpleView.as_view()(request)
+    assert response["Content-Type"].startswith("text/html")
+    assert response["Vary"] == "Accept"
+
+    # views without exports don't depend on the Accept header
+    SimpleView.table_export_formats = ()
+    response = SimpleView.as_view()(request)
+    assert not response.has_header("Vary")
+
+
+@views.test
+def server_timing_middleware_reports_table_timings():
+    from django.http import HttpResponse
+    from django.template import RequestContext, Template
+    from django_tables2.timings import ServerTimingMiddleware
+    import logging
+
+    for name in ("Queensland", "New South Wales", "Victoria"):
+        Region.objects.create(name=name)
+
+    middleware = ServerTimingMiddleware()
+    request = build_request('/?regions-sort=name')
+    middleware.process_request(request)
+    table = SimpleTable(Region.objects.all(), prefix="regions-")
+    tables.RequestConfig(request, paginate={"per_page": 2}).configure(table)
+    template = Template('{% load django_tables2 %}{% render_table table %}')
+    html = template.render(RequestContext(request, {"table": table}))
+    assert list(table.timings) == ["sort", "count", "paginate", "fetch", "render"]
+    durations = [seconds for phase, seconds in table.timings.items()]
+    assert min(durations) >= 0
+    assert table.timings["render"] >= table.timings["fetch"]
+
+    # the timings of each table are added, slow renders are logged
+    messages = []
+    handler = logging.Handler()
+    handler.emit = lambda record: messages.append(record.getMessage())
+    logger = logging.getLogger("django_tables2")
+    logger.addHandler(handler)
+    try:
+        middleware.slow_render = 0
+        response = HttpResponse(html)
+        response["Server-Timing"] = "db;dur=2"
+        response = middleware.process_response(request, response)
+    finally:
+        logger.removeHandler(handler)
+    metrics = [metric.split(";")[0] for metric in response["Server-Timing"].split(", ")]
+    assert metrics == ["db", "regions-.sort", "regions-.count", "regions-.paginate",
+                       "regions-.fetch", "regions-.render"]
+    assert len(messages) == 1
+    assert messages[0].startswith("Rendering SimpleTable took ")
+
+    # without the middleware, nothing is tracked
+    request = build_request('/')
+    tables.RequestConfig(request).configure(SimpleTable([]))
+    response = middleware.process_response(request, HttpResponse())
+    assert not response.has_header("Server-Timing")